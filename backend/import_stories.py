@@ -0,0 +1,35 @@
+"""Restore stories from an /api/stories/export file.
+
+Usage: python import_stories.py <export file>   (JSON or NDJSON, gzip ok; "-" reads stdin)
+
+Uses the same DATABASE_URL / stories.db as the server and the same batched
+import as POST /api/stories/import.
+"""
+import asyncio
+import sys
+
+import main
+
+
+def run(path: str):
+    main.init_db()
+    if path == "-":
+        report = main.import_stories(sys.stdin.buffer)
+    else:
+        with open(path, "rb") as f:
+            report = main.import_stories(f)
+    print(f"📥 Read {report['read']} stories: {report['inserted']} inserted, "
+          f"{report['duplicates']} already present, {report['invalid']} invalid "
+          f"in {report['seconds']}s ({report['rows_per_second']} rows/s)")
+    if isinstance(main.event_bus, main.PostgresEventBus):
+        # Let running workers reload their counters and context
+        asyncio.run(main.event_bus.publish("resync", ""))
+    else:
+        print("ℹ️ Restart the server (or let it start) to pick up the new counts")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    run(sys.argv[1])
@@ -1,24 +1,45 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, UploadFile, File
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, UploadFile, File, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 import google.generativeai as genai
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import format_datetime
 import sqlite3
 import os
 import tempfile
 import speech_recognition as sr
-from pydub import AudioSegment
+import subprocess
 import json
 import re
 from pathlib import Path
 import asyncio
-from fastapi.responses import FileResponse
+import base64
+import hashlib
+import random
+import threading
+import time
+import unicodedata
+import csv
+import io
+import gzip
+import shutil
+import zlib
+from collections import OrderedDict, deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait as wait_futures
+from fastapi.responses import FileResponse, StreamingResponse
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 from urllib.parse import urlparse
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 app = FastAPI(title="Story Transformer")
 
 app.add_middleware(
@@ -36,30 +57,195 @@ app.mount("/submit", StaticFiles(directory=str(FRONTEND_DIR / "submit"), html=Tr
 app.mount("/display", StaticFiles(directory=str(FRONTEND_DIR / "display"), html=True), name="display")
 app.mount("/moderate", StaticFiles(directory=str(FRONTEND_DIR / "moderate"), html=True), name="moderate")
 
-def get_db():
-    """Get database connection - uses PostgreSQL if DATABASE_URL is set, otherwise SQLite"""
-    database_url = os.getenv('DATABASE_URL')
-    
-    if database_url:
-        # PostgreSQL (Render)
-        parsed = urlparse(database_url)
-        conn = psycopg2.connect(
-            database=parsed.path[1:],  # Remove leading /
-            user=parsed.username,
-            password=parsed.password,
-            host=parsed.hostname,
-            port=parsed.port
-        )
-        return conn
-    else:
-        # SQLite (local development)
-        conn = sqlite3.connect('stories.db', check_same_thread=False)
-        conn.row_factory = sqlite3.Row
+# The database backend is decided once, at import time
+DATABASE_URL = os.getenv('DATABASE_URL')
+USE_POSTGRES = DATABASE_URL is not None
+SQLITE_PATH = 'stories.db'
+
+class PostgresPool:
+    """Bounded psycopg2 connection pool with health checks on checkout.
+
+    Checkouts block for up to DB_POOL_TIMEOUT seconds when all DB_POOL_MAX
+    connections are in use. Connections idle for longer than
+    DB_POOL_PING_AFTER seconds are pinged before being handed out, and
+    broken ones are discarded and replaced.
+    """
+
+    def __init__(self, database_url: str, minconn: int, maxconn: int, timeout: float, ping_after: float):
+        self.database_url = database_url
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self.stats = {"checkouts": 0, "waits": 0, "wait_seconds": 0.0, "in_use": 0, "discarded": 0, "timeouts": 0}
+
+    def _ensure_pool(self):
+        with self._lock:
+            if self._pool is None:
+                parsed = urlparse(self.database_url)
+                self._pool = ThreadedConnectionPool(
+                    self.minconn, self.maxconn,
+                    database=parsed.path[1:],  # Remove leading /
+                    user=parsed.username,
+                    password=parsed.password,
+                    host=parsed.hostname,
+                    port=parsed.port
+                )
+            return self._pool
+
+    def _healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - self._last_used.get(id(conn), 0) < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        pool = self._ensure_pool()
+        started = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats["waits"] += 1
+            if not self._slots.acquire(timeout=self.timeout):
+                with self._lock:
+                    self.stats["timeouts"] += 1
+                raise Exception(f"Timed out waiting {self.timeout}s for a database connection")
+        try:
+            while True:
+                conn = pool.getconn()
+                if self._healthy(conn):
+                    break
+                pool.putconn(conn, close=True)
+                with self._lock:
+                    self.stats["discarded"] += 1
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.stats["checkouts"] += 1
+            self.stats["in_use"] += 1
+            self.stats["wait_seconds"] += time.monotonic() - started
         return conn
 
+    def release(self, conn):
+        broken = conn.closed
+        if not broken:
+            try:
+                # Never hand out a connection with an open transaction
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                broken = True
+        self._last_used[id(conn)] = time.monotonic()
+        self._pool.putconn(conn, close=broken)
+        with self._lock:
+            self.stats["in_use"] -= 1
+            if broken:
+                self.stats["discarded"] += 1
+        self._slots.release()
+
+    def close_all(self):
+        if self._pool is not None:
+            self._pool.closeall()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"backend": "postgres", "max_connections": self.maxconn, **self.stats}
+
+class SQLitePool:
+    """One SQLite connection per thread, reused across checkouts.
+
+    Nested checkouts on the same thread share the connection; an
+    uncommitted transaction is rolled back when the outermost one closes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self.stats = {"checkouts": 0, "connections": 0}
+
+    def acquire(self):
+        local = self._local
+        if getattr(local, "conn", None) is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            # WAL lets readers on other threads proceed while a write is in progress
+            conn.execute("PRAGMA journal_mode=WAL")
+            local.conn = conn
+            local.depth = 0
+            with self._lock:
+                self._connections.append(conn)
+                self.stats["connections"] += 1
+        local.depth += 1
+        with self._lock:
+            self.stats["checkouts"] += 1
+        return local.conn
+
+    def release(self, conn):
+        local = self._local
+        local.depth -= 1
+        if local.depth == 0 and conn.in_transaction:
+            conn.rollback()
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"backend": "sqlite", **self.stats}
+
+class PooledConnection:
+    """A pooled connection; close() returns it to the pool instead of closing it"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+if USE_POSTGRES:
+    db_pool = PostgresPool(
+        DATABASE_URL,
+        minconn=int(os.getenv("DB_POOL_MIN", 1)),
+        maxconn=int(os.getenv("DB_POOL_MAX", 10)),
+        timeout=float(os.getenv("DB_POOL_TIMEOUT", 10)),
+        ping_after=float(os.getenv("DB_POOL_PING_AFTER", 30))
+    )
+else:
+    db_pool = SQLitePool(SQLITE_PATH)
+
+def get_db():
+    """Get a pooled database connection - PostgreSQL if DATABASE_URL is set, otherwise SQLite"""
+    return PooledConnection(db_pool, db_pool.acquire())
+
 def is_postgres():
     """Check if using PostgreSQL"""
-    return os.getenv('DATABASE_URL') is not None
+    return USE_POSTGRES
 
 def execute_query(conn, query, params=None):
     """Execute query that works with both SQLite and PostgreSQL"""
@@ -98,45 +284,87 @@ def fetchone_dict(conn, cursor):
         row = cursor.fetchone()
         return dict(row) if row else None
 
-def init_db():
+
+# Blocking DB work runs on its own bounded thread pool so handlers never
+# stall the event loop; DB_MAX_WORKERS caps concurrent DB operations.
+DB_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", 8))
+db_executor = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix="db")
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking database function on the DB executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, lambda: func(*args, **kwargs))
+
+def query_all(query, params=None) -> list:
+    """Run a query on a pooled connection and return all rows as dicts"""
     conn = get_db()
-    is_postgres = os.getenv('DATABASE_URL') is not None
-    
-    if is_postgres:
-        # PostgreSQL
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS stories (
-                id SERIAL PRIMARY KEY,
-                original_text TEXT NOT NULL,
-                transformed_text TEXT,
-                llm_comment TEXT,
-                author_name TEXT,
-                status TEXT DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                moderated_at TIMESTAMP,
-                moderated_by TEXT,
-                emoji_theme TEXT,
-                emoji_data TEXT
-            )
-        ''')
-        
-        # Check if llm_comment column exists
-        cursor.execute("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name='stories' AND column_name='llm_comment'
-        """)
-        if not cursor.fetchone():
-            cursor.execute('ALTER TABLE stories ADD COLUMN llm_comment TEXT')
-        
-        conn.commit()
-        cursor.close()
+    try:
+        cursor = execute_query(conn, query, params)
+        rows = fetchall_dict(conn, cursor)
+        if is_postgres():
+            cursor.close()
+        return rows
+    finally:
+        conn.close()
+
+def query_one(query, params=None) -> Optional[dict]:
+    """Run a query on a pooled connection and return the first row as a dict"""
+    conn = get_db()
+    try:
+        cursor = execute_query(conn, query, params)
+        row = fetchone_dict(conn, cursor)
+        if is_postgres():
+            cursor.close()
+        return row
+    finally:
+        conn.close()
+
+def open_stream_cursor(query, params=()):
+    """Open a cursor for reading a large result set in batches.
+
+    Postgres uses a named (server-side) cursor on a pooled connection so
+    rows stay on the server until fetched; SQLite gets a dedicated
+    connection, since the pooled ones are shared per thread. Returns
+    (conn, cursor) for fetch_batch/close_stream_cursor.
+    """
+    if is_postgres():
+        conn = get_db()
     else:
-        # SQLite
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS stories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+        conn = sqlite3.connect(SQLITE_PATH, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+    try:
+        if is_postgres():
+            cursor = conn.cursor(name=f"stream_{os.urandom(4).hex()}", cursor_factory=RealDictCursor)
+            cursor.execute(query.replace('?', '%s'), params)
+        else:
+            cursor = conn.execute(query, params)
+    except Exception:
+        if is_postgres():
+            conn.rollback()
+        conn.close()
+        raise
+    return conn, cursor
+
+def fetch_batch(cursor, size: int) -> list:
+    return [dict(row) for row in cursor.fetchmany(size)]
+
+def close_stream_cursor(conn, cursor):
+    try:
+        cursor.close()
+        if is_postgres():
+            conn.rollback()
+    finally:
+        conn.close()
+
+async def fetchall_async(query, params=None) -> list:
+    """Async counterpart of execute_query + fetchall_dict"""
+    return await run_db(query_all, query, params)
+
+async def fetchone_async(query, params=None) -> Optional[dict]:
+    """Async counterpart of execute_query + fetchone_dict"""
+    return await run_db(query_one, query, params)
+
+STORIES_COLUMNS = '''
                 original_text TEXT NOT NULL,
                 transformed_text TEXT,
                 llm_comment TEXT,
@@ -147,21 +375,102 @@ def init_db():
                 moderated_by TEXT,
                 emoji_theme TEXT,
                 emoji_data TEXT
-            )
-        ''')
-        
-        # Add llm_comment column if it doesn't exist
-        try:
-            conn.execute('SELECT llm_comment FROM stories LIMIT 1')
-        except sqlite3.OperationalError:
-            try:
-                conn.execute('ALTER TABLE stories ADD COLUMN llm_comment TEXT')
-                conn.commit()
-                print("✅ Added llm_comment column to stories table")
-            except sqlite3.OperationalError as e:
-                print(f"⚠️ Could not add llm_comment column: {e}")
+'''
+
+def run_statement(conn, statement):
+    """Execute a statement whose result is not needed"""
+    cursor = execute_query(conn, statement)
+    if is_postgres():
+        cursor.close()
+
+def add_llm_comment_column(conn):
+    """Add stories.llm_comment to databases created before the column existed"""
+    if is_postgres():
+        run_statement(conn, "ALTER TABLE stories ADD COLUMN IF NOT EXISTS llm_comment TEXT")
+        return
+    columns = [row["name"] for row in fetchall_dict(conn, execute_query(conn, "PRAGMA table_info(stories)"))]
+    if "llm_comment" not in columns:
+        run_statement(conn, "ALTER TABLE stories ADD COLUMN llm_comment TEXT")
+
+# Versioned schema migrations, applied in order and recorded in schema_migrations.
+# A step is SQL run on both backends, a {"sqlite": ..., "postgres": ...} dict for
+# the rare dialect differences, or a callable taking the connection. Every step
+# must be idempotent so a half-applied migration can simply be re-run.
+MIGRATIONS = [
+    (1, "create stories", [
+        {
+            "sqlite": f"CREATE TABLE IF NOT EXISTS stories (id INTEGER PRIMARY KEY AUTOINCREMENT,{STORIES_COLUMNS})",
+            "postgres": f"CREATE TABLE IF NOT EXISTS stories (id SERIAL PRIMARY KEY,{STORIES_COLUMNS})"
+        },
+    ]),
+    (2, "add stories.llm_comment", [add_llm_comment_column]),
+    (3, "create transformation_cache", [
+        """CREATE TABLE IF NOT EXISTS transformation_cache (
+            cache_key TEXT PRIMARY KEY,
+            result TEXT NOT NULL,
+            created_at DOUBLE PRECISION NOT NULL
+        )""",
+    ]),
+    (4, "index hot story queries", [
+        # /api/stories, /api/stories/pending and the per-status counts
+        "CREATE INDEX IF NOT EXISTS idx_stories_status_created ON stories (status, created_at)",
+        # Recent approved stories used as LLM context
+        "CREATE INDEX IF NOT EXISTS idx_stories_status_moderated ON stories (status, (COALESCE(moderated_at, created_at)))",
+        # Cache expiry and trimming
+        "CREATE INDEX IF NOT EXISTS idx_transformation_cache_created ON transformation_cache (created_at)",
+    ]),
+    (5, "index story keyset pagination", [
+        # Keyset pages on (created_at, id), per status and across all stories
+        "CREATE INDEX IF NOT EXISTS idx_stories_status_created_id ON stories (status, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_stories_created_id ON stories (created_at, id)",
+        "DROP INDEX IF EXISTS idx_stories_status_created",
+    ]),
+]
+
+def run_migrations(conn) -> list:
+    """Apply pending migrations and return the versions applied"""
+    run_statement(conn, """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    if is_postgres():
+        # Serialize concurrent workers starting up at the same time
+        run_statement(conn, "SELECT pg_advisory_xact_lock(7428130)")
+    
+    applied = {row["version"] for row in fetchall_dict(conn, execute_query(conn, "SELECT version FROM schema_migrations"))}
+    newly_applied = []
+    dialect = "postgres" if is_postgres() else "sqlite"
+    
+    for version, name, steps in MIGRATIONS:
+        if version in applied:
+            continue
+        for step in steps:
+            if callable(step):
+                step(conn)
+            else:
+                run_statement(conn, step[dialect] if isinstance(step, dict) else step)
+        cursor = execute_query(conn, "INSERT INTO schema_migrations (version, name) VALUES (?, ?)", (version, name))
+        if is_postgres():
+            cursor.close()
+        else:
+            # Postgres DDL is transactional, so it commits once under the advisory lock
+            conn.commit()
+        newly_applied.append(version)
+        print(f"✅ Applied migration {version}: {name}")
     
-    conn.close()
+    conn.commit()
+    return newly_applied
+
+def init_db():
+    """Bring the database schema up to date"""
+    conn = get_db()
+    try:
+        run_migrations(conn)
+    finally:
+        conn.close()
 
 # Configure Gemini with fallback models (from MEDEA paper branch)
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
@@ -191,40 +500,797 @@ if not models:
 else:
     print(f"✅ Initialized with {len(models)} models")
 
-def generate_with_fallback(prompt: str, temperature: float = 0.2, max_tokens: int = 1024) -> str:
-    """Generate content with automatic model fallbacks"""
+class ModelRouter:
+    """Health-aware ordering of the model fallback chain.
+
+    Tracks an EWMA of latency and success rate per model. After
+    ROUTER_FAILURE_THRESHOLD consecutive failures a model's circuit opens
+    and it is skipped; once ROUTER_COOLDOWN seconds have passed a single
+    request is allowed through as a probe, which closes the circuit on
+    success or re-opens it on failure.
+    """
+
+    def __init__(self, model_names: List[str], alpha: float, failure_threshold: int, cooldown: float):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.decisions = deque(maxlen=50)
+        self.health = {
+            name: {
+                "state": "closed",
+                "ewma_latency": None,
+                "success_rate": 1.0,
+                "consecutive_failures": 0,
+                "calls": 0,
+                "failures": 0,
+                "opened_at": None,
+                "probing": False,
+                "last_error": None,
+                "samples": deque(maxlen=100)
+            }
+            for name in model_names
+        }
+
+    def order(self, candidates: list, handed_out: Optional[list] = None) -> list:
+        """Return (name, model) pairs to try: a due probe first, then healthy models fastest first.
+
+        Names of probes handed out are appended to handed_out, so the caller
+        can release_probe() any it never gets to attempt.
+        """
+        now = time.time()
+        probes, healthy = [], []
+        with self._lock:
+            for index, (name, model) in enumerate(candidates):
+                h = self.health[name]
+                if h["state"] == "open":
+                    if not h["probing"] and now - h["opened_at"] >= self.cooldown:
+                        h["state"] = "half_open"
+                        h["probing"] = True
+                        probes.append((name, model))
+                    continue
+                if h["state"] == "half_open":
+                    # A probe is already in flight
+                    continue
+                # Unmeasured models go first (in configured order) so every model gets measured
+                latency = h["ewma_latency"]
+                score = latency / max(h["success_rate"], 0.05) if latency is not None else 0.0
+                healthy.append((score, index, name, model))
+        
+        healthy.sort(key=lambda item: (item[0], item[1]))
+        if handed_out is not None:
+            handed_out.extend(name for name, _ in probes)
+        ordered = probes + [(name, model) for _, _, name, model in healthy]
+        if not ordered:
+            # Every circuit is open - fall back to the configured order rather than failing outright
+            ordered = list(candidates)
+        self.decisions.append({
+            "at": datetime.now().isoformat(),
+            "order": [name for name, _ in ordered],
+            "probes": [name for name, _ in probes]
+        })
+        return ordered
+
+    def release_probe(self, name: str):
+        """Return an unattempted probe, so the next request can take it"""
+        with self._lock:
+            h = self.health[name]
+            if h["state"] == "half_open" and h["probing"]:
+                h["state"] = "open"
+                h["probing"] = False
+
+    def is_open(self, name: str) -> bool:
+        with self._lock:
+            return self.health[name]["state"] == "open"
+
+    def record_success(self, name: str, latency: float):
+        with self._lock:
+            h = self.health[name]
+            h["calls"] += 1
+            h["ewma_latency"] = latency if h["ewma_latency"] is None else (
+                self.alpha * latency + (1 - self.alpha) * h["ewma_latency"])
+            h["success_rate"] = self.alpha + (1 - self.alpha) * h["success_rate"]
+            h["consecutive_failures"] = 0
+            h["samples"].append(latency)
+            if h["state"] != "closed":
+                print(f"✅ Circuit closed for {name}")
+            h["state"] = "closed"
+            h["probing"] = False
+            h["opened_at"] = None
+
+    def record_failure(self, name: str, error: Exception):
+        with self._lock:
+            h = self.health[name]
+            h["calls"] += 1
+            h["failures"] += 1
+            h["success_rate"] = (1 - self.alpha) * h["success_rate"]
+            h["consecutive_failures"] += 1
+            h["last_error"] = str(error)
+            if h["state"] == "half_open" or h["consecutive_failures"] >= self.failure_threshold:
+                if h["state"] != "open":
+                    print(f"⚠️ Circuit opened for {name} after {h['consecutive_failures']} failures")
+                h["state"] = "open"
+                h["probing"] = False
+                h["opened_at"] = time.time()
+
+    def latency_percentile(self, name: str, percentile: float, min_samples: int = 10) -> Optional[float]:
+        """Latency percentile of recent successful calls, or None with too few samples"""
+        with self._lock:
+            samples = sorted(self.health[name]["samples"])
+        if len(samples) < min_samples:
+            return None
+        index = min(int(len(samples) * percentile / 100), len(samples) - 1)
+        return samples[index]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "models": {
+                    name: {k: v for k, v in h.items() if k not in ("probing", "samples")}
+                    for name, h in self.health.items()
+                },
+                "recent_decisions": list(self.decisions)[-10:],
+                "failure_threshold": self.failure_threshold,
+                "cooldown_seconds": self.cooldown
+            }
+
+model_router = ModelRouter(
+    [name for name, _ in models],
+    alpha=float(os.getenv("ROUTER_EWMA_ALPHA", 0.3)),
+    failure_threshold=int(os.getenv("ROUTER_FAILURE_THRESHOLD", 3)),
+    cooldown=float(os.getenv("ROUTER_COOLDOWN", 60))
+)
+
+class LLMDeadlineExceeded(Exception):
+    """Raised when an LLM call runs out of budget or its client goes away"""
+
+class LLMDeadline:
+    """Time budget shared by every attempt of one LLM-backed request.
+
+    The Gemini client is synchronous, so an in-flight call cannot be
+    interrupted; cancelling the deadline stops further retries, fallbacks
+    and backoff sleeps as soon as the current call returns.
+    """
+
+    def __init__(self, budget_seconds: float):
+        self.budget = budget_seconds
+        self.started = time.monotonic()
+        self.attempts = 0
+        self.reason = None
+        self._cancelled = threading.Event()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        return max(self.budget - self.elapsed(), 0.0)
+
+    def cancel(self, reason: str):
+        if not self._cancelled.is_set():
+            self.reason = reason
+            self._cancelled.set()
+
+    def check(self):
+        """Raise LLMDeadlineExceeded if the budget is spent or the call was cancelled"""
+        if not self._cancelled.is_set() and self.remaining() <= 0:
+            self.cancel("deadline exceeded")
+        if self._cancelled.is_set():
+            raise LLMDeadlineExceeded(self.reason)
+
+    def sleep(self, seconds: float) -> bool:
+        """Back off for up to `seconds`; returns False if the budget cannot cover it or we were cancelled"""
+        if seconds >= self.remaining():
+            return False
+        return not self._cancelled.wait(seconds)
+
+    def report(self) -> dict:
+        return {
+            "budget_seconds": self.budget,
+            "used_seconds": round(self.elapsed(), 3),
+            "used_fraction": round(min(self.elapsed() / self.budget, 1.0), 3) if self.budget else 1.0,
+            "attempts": self.attempts,
+            "cancelled": self.reason
+        }
+
+# Per-endpoint LLM budgets (seconds) and retry backoff; previews may hedge slow calls
+LLM_DEADLINE_SUBMIT = float(os.getenv("LLM_DEADLINE_SUBMIT", 45))
+LLM_DEADLINE_PREVIEW = float(os.getenv("LLM_DEADLINE_PREVIEW", 20))
+LLM_HEDGE_PREVIEW = os.getenv("LLM_HEDGE_PREVIEW", "true").lower() in ("1", "true", "yes")
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", 0.5))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", 4))
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for retry number `attempt` (1-based)"""
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** (attempt - 1))))
+
+def call_model(model_name: str, model, prompt: str, temperature: float, max_tokens: int) -> str:
+    """Single generation attempt on one model, recorded in the router"""
+    started = time.perf_counter()
+    try:
+        response = model.generate_content(
+            prompt,
+            generation_config=genai.types.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens
+            )
+        )
+        if not (response.text and response.text.strip()):
+            raise Exception(f"Empty response from {model_name}")
+    except Exception as e:
+        model_router.record_failure(model_name, e)
+        raise
+    model_router.record_success(model_name, time.perf_counter() - started)
+    return response.text.strip()
+
+class HedgePolicy:
+    """Decides when to hedge a slow primary call and keeps hedging metrics.
+
+    The hedge fires after the primary model's LLM_HEDGE_PERCENTILE latency
+    (LLM_HEDGE_DEFAULT_DELAY until enough samples exist). Extra calls are
+    capped at LLM_HEDGE_MAX_RATIO of hedge-eligible calls.
+    """
+
+    def __init__(self, percentile: float, default_delay: float, max_ratio: float):
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.max_ratio = max_ratio
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "hedges_started": 0, "hedge_wins": 0, "primary_wins": 0,
+                      "skipped_budget": 0, "all_failed": 0}
+
+    def delay_for(self, model_name: str) -> float:
+        delay = model_router.latency_percentile(model_name, self.percentile)
+        return delay if delay is not None else self.default_delay
+
+    def record(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def try_acquire(self) -> bool:
+        """Reserve one extra call if the hedge budget allows it"""
+        with self._lock:
+            if self.stats["hedges_started"] + 1 > self.max_ratio * self.stats["calls"]:
+                self.stats["skipped_budget"] += 1
+                return False
+            self.stats["hedges_started"] += 1
+            return True
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            decided = self.stats["hedge_wins"] + self.stats["primary_wins"]
+            return {
+                **self.stats,
+                "hedge_win_rate": round(self.stats["hedge_wins"] / self.stats["hedges_started"], 3)
+                if self.stats["hedges_started"] else 0.0,
+                "hedge_share_of_wins": round(self.stats["hedge_wins"] / decided, 3) if decided else 0.0,
+                "percentile": self.percentile,
+                "default_delay": self.default_delay,
+                "max_ratio": self.max_ratio
+            }
+
+hedge_policy = HedgePolicy(
+    percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", 95)),
+    default_delay=float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", 3)),
+    max_ratio=float(os.getenv("LLM_HEDGE_MAX_RATIO", 0.1))
+)
+# Hedged calls need their own threads: the caller is already an LLM executor worker
+hedge_executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_HEDGE_WORKERS", 8)),
+                                    thread_name_prefix="llm-hedge")
+
+def generate_hedged(ordered: list, prompt: str, temperature: float, max_tokens: int,
+                    deadline: Optional[LLMDeadline] = None, attempted: Optional[set] = None) -> tuple:
+    """Race the primary model against a delayed hedge on the next model.
+
+    Returns (text or None, names of the models tried). The slower call is
+    abandoned: its thread finishes in the background and its result is dropped.
+    """
+    hedge_policy.record("calls")
+    (primary_name, primary), (backup_name, backup) = ordered[0], ordered[1]
+    
+    if deadline:
+        deadline.check()
+        deadline.attempts += 1
+    pending = {hedge_executor.submit(call_model, primary_name, primary, prompt, temperature, max_tokens): primary_name}
+    tried = [primary_name]
+    if attempted is not None:
+        attempted.add(primary_name)
+    
+    delay = hedge_policy.delay_for(primary_name)
+    if deadline:
+        delay = min(delay, deadline.remaining())
+    done, _ = wait_futures(list(pending), timeout=delay)
+    
+    # Hedge only if the primary is still running (a fast failure falls through to the normal chain)
+    if not done and hedge_policy.try_acquire():
+        print(f"🔀 Hedging {primary_name} with {backup_name} after {delay:.2f}s")
+        if deadline:
+            deadline.attempts += 1
+        pending[hedge_executor.submit(call_model, backup_name, backup, prompt, temperature, max_tokens)] = backup_name
+        tried.append(backup_name)
+        if attempted is not None:
+            attempted.add(backup_name)
+    
+    while pending:
+        # Wake up periodically so a cancelled deadline is noticed
+        timeout = min(deadline.remaining(), 0.25) if deadline else None
+        done, _ = wait_futures(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+        if deadline:
+            deadline.check()
+        for future in done:
+            name = pending.pop(future)
+            try:
+                text = future.result()
+            except Exception as e:
+                print(f"⚠️ {name} hedged attempt failed: {e}")
+                continue
+            if len(tried) > 1:
+                hedge_policy.record("hedge_wins" if name == backup_name else "primary_wins")
+            print(f"✅ Success with {name}")
+            return text, tried
+    
+    if len(tried) > 1:
+        hedge_policy.record("all_failed")
+    return None, tried
+
+def generate_with_fallback(prompt: str, temperature: float = 0.2, max_tokens: int = 1024,
+                           deadline: Optional[LLMDeadline] = None, hedge: bool = False) -> str:
+    """Generate content with automatic model fallbacks, routed by model health.
+
+    With hedge=True the first call is raced against a delayed call on the
+    next model in the chain (see generate_hedged).
+    """
     if not models:
         raise Exception("No models available for generation")
     
+    if deadline:
+        # Don't hand out a probe for a job that has already run out of time
+        deadline.check()
+    
+    probes, attempted = [], set()
+    try:
+        return _generate_ordered(model_router.order(models, probes), attempted,
+                                 prompt, temperature, max_tokens, deadline, hedge)
+    finally:
+        for name in probes:
+            if name not in attempted:
+                model_router.release_probe(name)
+
+def _generate_ordered(ordered: list, attempted: set, prompt: str, temperature: float, max_tokens: int,
+                      deadline: Optional[LLMDeadline], hedge: bool) -> str:
     last_error = None
     
-    # Try each model in the fallback chain
-    for model_name, model in models:
+    if hedge and len(ordered) > 1:
+        text, tried = generate_hedged(ordered, prompt, temperature, max_tokens, deadline, attempted)
+        if text is not None:
+            if deadline:
+                deadline.check()
+            return text
+        # Both racers failed - continue with the rest of the chain
+        ordered = [(name, model) for name, model in ordered if name not in tried] or ordered
+    
+    # Try each model, fastest healthy first
+    for model_name, model in ordered:
         for attempt in range(3):  # 3 retries per model
+            # Stop retrying a model once its circuit has opened
+            if attempt and model_router.is_open(model_name):
+                break
+            if deadline:
+                # Jittered backoff between retries of the same model
+                if attempt and not deadline.sleep(backoff_delay(attempt)):
+                    deadline.check()
+                    break
+                deadline.check()
+                deadline.attempts += 1
+            attempted.add(model_name)
             try:
-                response = model.generate_content(
-                    prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=temperature,
-                        max_output_tokens=max_tokens
-                    )
-                )
-                
-                if response.text and response.text.strip():
-                    print(f"✅ Success with {model_name}")
-                    return response.text.strip()
-                else:
-                    print(f"⚠️ Empty response from {model_name}")
-                    continue
-                    
+                text = call_model(model_name, model, prompt, temperature, max_tokens)
+                print(f"✅ Success with {model_name}")
+                if deadline:
+                    # The caller may have given up while this call was in flight
+                    deadline.check()
+                return text
             except Exception as e:
                 print(f"⚠️ {model_name} attempt {attempt + 1} failed: {e}")
                 last_error = e
                 continue
     
+    if deadline:
+        deadline.check()
+    
     # All models failed
     raise Exception(f"All LLM models failed. Last error: {last_error}")
 
+# The Gemini client is synchronous, so LLM work runs on a bounded thread pool
+# instead of the event loop. LLM_MAX_CONCURRENCY caps parallel generations.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+
+# When no style is requested, analysis and transformation are done in one
+# structured LLM call. Set LLM_SINGLE_PASS=false to restore the two-call flow.
+LLM_SINGLE_PASS = os.getenv("LLM_SINGLE_PASS", "true").lower() in ("1", "true", "yes")
+
+async def run_llm(func, *args, **kwargs):
+    """Run a blocking LLM call on the LLM executor without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(llm_executor, lambda: func(*args, **kwargs))
+
+async def wait_for_disconnect(request: Request, interval: float = 0.5):
+    """Return once the HTTP client has gone away"""
+    while not await request.is_disconnected():
+        await asyncio.sleep(interval)
+
+async def run_llm_with_deadline(deadline: LLMDeadline, request: Optional[Request], func, *args, **kwargs):
+    """Run an LLM call within `deadline`, giving up on budget exhaustion or client disconnect"""
+    work = asyncio.ensure_future(run_llm(func, *args, deadline=deadline, **kwargs))
+    watcher = asyncio.create_task(wait_for_disconnect(request)) if request is not None else None
+    waiters = {work, watcher} if watcher else {work}
+    
+    done, _ = await asyncio.wait(waiters, timeout=deadline.remaining(), return_when=asyncio.FIRST_COMPLETED)
+    if watcher and not watcher.done():
+        watcher.cancel()
+    if work in done:
+        return work.result()
+    
+    # Stop the worker from retrying; the in-flight call finishes in the background
+    deadline.cancel("client disconnected" if watcher in done else "deadline exceeded")
+    work.add_done_callback(lambda f: f.cancelled() or f.exception())
+    raise LLMDeadlineExceeded(deadline.reason)
+
+class TransformationCache:
+    """Content-addressed cache of transformation results.
+
+    An in-process LRU sits in front of the transformation_cache table, so
+    repeated submissions and previews skip the LLM entirely. Entries expire
+    after TRANSFORM_CACHE_TTL seconds; the LRU holds TRANSFORM_CACHE_SIZE
+    entries and the table is trimmed to TRANSFORM_CACHE_MAX_ROWS.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_rows: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(text: str, style: str, prompt_variant: str, context: str) -> str:
+        """Hash normalized text, style, prompt variant and a context fingerprint"""
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        context_fingerprint = hashlib.sha256((context or "").encode("utf-8")).hexdigest()
+        material = "\x1f".join([normalized, style or "", prompt_variant, context_fingerprint])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, result: dict, created_at: float):
+        with self._lock:
+            self._entries[key] = (created_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                if now - entry[0] < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[1]
+                del self._entries[key]
+        
+        try:
+            conn = get_db()
+            try:
+                cursor = execute_query(
+                    conn,
+                    "SELECT result, created_at FROM transformation_cache WHERE cache_key = ? AND created_at >= ?",
+                    (key, now - self.ttl_seconds)
+                )
+                row = fetchone_dict(conn, cursor)
+                if is_postgres():
+                    cursor.close()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"⚠️ Transformation cache read failed: {e}")
+            row = None
+        
+        if not row:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        
+        result = json.loads(row["result"])
+        self._remember(key, result, row["created_at"])
+        with self._lock:
+            self.stats["db_hits"] += 1
+        return result
+
+    def put(self, key: str, result: dict):
+        now = time.time()
+        self._remember(key, result, now)
+        try:
+            conn = get_db()
+            try:
+                cursor = execute_query(
+                    conn,
+                    "INSERT INTO transformation_cache (cache_key, result, created_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (cache_key) DO UPDATE SET result = excluded.result, created_at = excluded.created_at",
+                    (key, json.dumps(result, ensure_ascii=False), now)
+                )
+                if is_postgres():
+                    cursor.close()
+                conn.commit()
+                
+                with self._lock:
+                    self.stats["stores"] += 1
+                    self._puts += 1
+                    prune = self._puts % 50 == 0
+                if prune:
+                    self.prune(conn)
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"⚠️ Transformation cache write failed: {e}")
+
+    def prune(self, conn):
+        """Delete expired rows and trim the table to max_rows"""
+        cursor = execute_query(conn, "DELETE FROM transformation_cache WHERE created_at < ?",
+                               (time.time() - self.ttl_seconds,))
+        if is_postgres():
+            cursor.close()
+        cursor = execute_query(
+            conn,
+            "SELECT created_at FROM transformation_cache ORDER BY created_at DESC LIMIT 1 OFFSET ?",
+            (self.max_rows,)
+        )
+        cutoff = fetchone_dict(conn, cursor)
+        if is_postgres():
+            cursor.close()
+        if cutoff:
+            cursor = execute_query(conn, "DELETE FROM transformation_cache WHERE created_at <= ?",
+                                   (cutoff["created_at"],))
+            if is_postgres():
+                cursor.close()
+        conn.commit()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.stats["memory_hits"] + self.stats["db_hits"] + self.stats["misses"]
+            hits = self.stats["memory_hits"] + self.stats["db_hits"]
+            return {
+                **self.stats,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "max_rows": self.max_rows
+            }
+
+transformation_cache = TransformationCache(
+    max_entries=int(os.getenv("TRANSFORM_CACHE_SIZE", 512)),
+    ttl_seconds=float(os.getenv("TRANSFORM_CACHE_TTL", 24 * 60 * 60)),
+    max_rows=int(os.getenv("TRANSFORM_CACHE_MAX_ROWS", 5000))
+)
+
+class RecentStoriesContext:
+    """Ring buffer of the last approved stories, rendered as LLM prompt context.
+
+    Loaded from the database on first use and updated in place when
+    stories are approved or un-approved, so building a prompt does not
+    query the database. Holds CONTEXT_STORIES stories; the rendered text
+    is capped at CONTEXT_MAX_CHARS and only rebuilt when the buffer changes.
+    """
+
+    def __init__(self, size: int, max_chars: int):
+        self.size = size
+        self.max_chars = max_chars
+        self._stories = deque(maxlen=size)
+        self._rendered = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        rows = query_all(
+            "SELECT id, transformed_text, author_name FROM stories WHERE status = 'approved' ORDER BY COALESCE(moderated_at, created_at) DESC LIMIT ?",
+            (self.size,)
+        )
+        with self._lock:
+            self._stories = deque(
+                ((row["id"], row.get("author_name") or 'Ανώνυμος', row.get("transformed_text") or '') for row in rows),
+                maxlen=self.size
+            )
+            self._rendered = {}
+            self._loaded = True
+
+    def add(self, story: dict):
+        """Record a newly approved story as the most recent one"""
+        with self._lock:
+            self._stories = deque((s for s in self._stories if s[0] != story["id"]), maxlen=self.size)
+            self._stories.appendleft((story["id"], story.get("author_name") or 'Ανώνυμος', story.get("transformed_text") or ''))
+            self._rendered = {}
+
+    def discard(self, story_id: int):
+        """Drop a story that is no longer approved, refilling the buffer from the database"""
+        with self._lock:
+            present = any(s[0] == story_id for s in self._stories)
+        if present:
+            self.load()
+
+    def render(self, limit: int) -> str:
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            if limit not in self._rendered:
+                context_parts = []
+                used = 0
+                for _, author, text in list(self._stories)[:limit]:
+                    line = f"- {author}: \"{text}\""
+                    if used + len(line) > self.max_chars:
+                        break
+                    context_parts.append(line)
+                    used += len(line) + 1
+                self._rendered[limit] = "\n".join(context_parts)
+            return self._rendered[limit]
+
+recent_stories = RecentStoriesContext(
+    size=int(os.getenv("CONTEXT_STORIES", 5)),
+    max_chars=int(os.getenv("CONTEXT_MAX_CHARS", 2000))
+)
+
+class KeywordClassifier:
+    """Single-pass keyword matcher for the sensitivity, disturbance,
+    relevance and emoji theme checks.
+
+    All keyword tables are compiled into one trie-shaped regex that matches
+    the longest keyword at a position. The text is scanned once, restarting
+    one character after each match so overlapping keywords are not missed;
+    shorter keywords that are prefixes of a match come from a precomputed
+    table. This gives the same answers as testing each keyword with `in`.
+    Tables are loaded from KEYWORDS_FILE.
+    """
+
+    def __init__(self, tables: dict):
+        self.irrelevant_threshold = tables.get("irrelevant_threshold", 3)
+        self.themes = tables["themes"]
+        self.default_theme = tables["default_theme"]
+        
+        self.labels = {}
+        for category in ("sensitive", "disturbing", "irrelevant"):
+            for keyword in tables[category]:
+                self.labels.setdefault(keyword.lower(), set()).add(category)
+        for index, theme in enumerate(self.themes):
+            for keyword in theme["keywords"]:
+                self.labels.setdefault(keyword.lower(), set()).add(index)
+        
+        keywords = list(self.labels)
+        self.prefixes = {k: [p for p in keywords if p != k and k.startswith(p)] for k in keywords}
+        self.pattern = re.compile(self._trie_pattern(keywords))
+        self.classify = lru_cache(maxsize=256)(self._classify)
+
+    @staticmethod
+    def _trie_pattern(keywords: list) -> str:
+        """Regex for a keyword trie; optional groups are greedy, so the longest keyword wins"""
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for ch in keyword:
+                node = node.setdefault(ch, {})
+            node[''] = {}
+        
+        def build(node: dict) -> str:
+            terminal = '' in node
+            branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != '']
+            if not branches:
+                return ''
+            if len(branches) == 1 and not terminal:
+                return branches[0]
+            group = '(?:' + '|'.join(branches) + ')'
+            return group + '?' if terminal else group
+        
+        return build(trie)
+
+    @classmethod
+    def from_file(cls, path: str) -> "KeywordClassifier":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _classify(self, text: str) -> dict:
+        found = set()
+        text = text.lower()
+        search = self.pattern.search
+        match = search(text)
+        while match:
+            keyword = match.group()
+            if keyword not in found:
+                found.add(keyword)
+                found.update(self.prefixes[keyword])
+            match = search(text, match.start() + 1)
+        
+        labels = set().union(*(self.labels[k] for k in found)) if found else set()
+        irrelevant_count = sum(1 for k in found if "irrelevant" in self.labels[k])
+        theme_indexes = [label for label in labels if isinstance(label, int)]
+        theme = self.themes[min(theme_indexes)] if theme_indexes else self.default_theme
+        
+        return {
+            "sensitive": "sensitive" in labels,
+            "disturbing": "disturbing" in labels,
+            "irrelevant_count": irrelevant_count,
+            "is_relevant": irrelevant_count < self.irrelevant_threshold,
+            "emoji_theme": {k: v for k, v in theme.items() if k != "keywords"}
+        }
+
+keyword_classifier = KeywordClassifier.from_file(
+    os.getenv("KEYWORDS_FILE", str(Path(__file__).resolve().parent / "keywords.json"))
+)
+
+class QualityScorer:
+    """Token-overlap fidelity and length sanity score for a transformation (0-1).
+
+    The tokenizer and stopword table are built once and thresholds are
+    constructor arguments. score_batch scores many (original, transformed)
+    pairs, tokenizing each distinct text only once, so the whole archive can
+    be re-scored after tuning thresholds.
+    """
+
+    TOKEN_RE = re.compile(r"[\w']+", flags=re.UNICODE)
+    STOPWORDS = frozenset({
+        'και','το','τα','τι','να','που','σε','στη','στην','στο','στον','για','με','από','δε','δεν','μη','μην','είναι','ή','θα','ως','ένα','μία','μια','ο','η','οι','των'
+    })
+
+    def __init__(self, high_overlap: float = 0.15, low_overlap: float = 0.08,
+                 ratio_range: tuple = (0.3, 1.5), length_range: tuple = (50, 300)):
+        self.high_overlap = high_overlap
+        self.low_overlap = low_overlap
+        self.ratio_range = ratio_range
+        self.length_range = length_range
+
+    def tokenize(self, text: str) -> frozenset:
+        stop = self.STOPWORDS
+        return frozenset(t for t in self.TOKEN_RE.findall(text.lower()) if t not in stop and len(t) > 2)
+
+    def _score(self, orig: frozenset, trans: frozenset, original_len: int, transformed_len: int) -> float:
+        # Fidelity contributes most
+        overlap = len(orig & trans) / max(len(orig) or 1, 1)
+        score = 0.0
+        if overlap >= self.high_overlap:
+            score += 0.5
+        elif overlap >= self.low_overlap:
+            score += 0.3
+        
+        # Length sanity
+        length_ratio = transformed_len / max(original_len, 1)
+        if self.ratio_range[0] <= length_ratio <= self.ratio_range[1]:
+            score += 0.25
+        if self.length_range[0] <= transformed_len <= self.length_range[1]:
+            score += 0.25
+        
+        return min(score, 1.0)
+
+    def score(self, original: str, transformed: str) -> float:
+        return self._score(self.tokenize(original), self.tokenize(transformed), len(original), len(transformed))
+
+    def score_batch(self, pairs) -> List[float]:
+        """Score an iterable of (original, transformed) pairs"""
+        tokens = {}
+        scores = []
+        for original, transformed in pairs:
+            original = original or ""
+            transformed = transformed or ""
+            orig = tokens.get(original)
+            if orig is None:
+                orig = tokens[original] = self.tokenize(original)
+            trans = tokens.get(transformed)
+            if trans is None:
+                trans = tokens[transformed] = self.tokenize(transformed)
+            scores.append(self._score(orig, trans, len(original), len(transformed)))
+        return scores
+
+quality_scorer = QualityScorer()
+
 # Enhanced AI Generation Features
 class StoryTransformer:
     def __init__(self):
@@ -349,125 +1415,71 @@ class StoryTransformer:
 
 Απάντηση:"""
         }
+
+        # Single-pass prompt: analysis, editing and comment in one JSON response
+        self.single_pass_prompt = """ΑΝΑΛΥΣΗ ΚΑΙ ΕΠΕΞΕΡΓΑΣΙΑ ΚΕΙΜΕΝΟΥ - ΤΡΙΑ ΜΕΡΗ ΣΕ ΜΙΑ ΑΠΑΝΤΗΣΗ
+
+ΜΕΡΟΣ 1: ΑΝΑΛΥΣΗ
+- emotional_tone: "positive", "neutral", "challenging", "hopeful"
+- main_themes: ["struggle", "hope", "family", "medical", "community", "achievement"]
+- suggested_style: "inspirational", "emotional", "community", "resilience"
+- confidence: 0-1
+
+ΜΕΡΟΣ 2: {edit_section}
+
+ΜΕΡΟΣ 3: ΣΧΟΛΙΟ (ΠΑΝΤΑ) - ΠΟΛΥ ΕΝΣΥΝΑΙΣΘΗΤΙΚΟ ΚΑΙ ΠΡΟΣΕΚΤΙΚΟ
+Διάβασε προσεκτικά το κείμενο. Απάντησε με ένα σύντομο σχόλιο (1-2 προτάσεις) στο πνεύμα του suggested_style:
+- inspirational: αναγνώρισε τη δύναμη ή προσέδωσε ελπίδα με ΜΕΤΡΗΜΕΝΟ και σεβαστό τρόπο
+- emotional: αναγνώρισε ΑΚΡΙΒΩΣ τα συναισθήματα χωρίς να προσπαθείς να τα "διορθώσεις"
+- community: τόνισε την αλληλεγγύη και τη σύνδεση, χωρίς να "αναγκάζεις" την έννοια της κοινότητας
+- resilience: αναγνώρισε τόσο την αντοχή όσο και τις δυσκολίες
+Σε κάθε περίπτωση:
+- Δείχνει ΑΥΘΕΝΤΙΚΗ ενσυναίσθηση (όχι επιφανειακή)
+- Μπορεί να συνδέσει με προηγούμενες ιστορίες αν υπάρχει φυσική σύνδεση
+- ΧΩΡΙΣ condescension, χωρίς "θα δεις", "θα καταλάβεις"
+- ΧΩΡΙΣ false optimism - απλά αναγνώρισε και σεβάσου την εμπειρία
+
+ΜΟΡΦΗ ΑΠΑΝΤΗΣΗΣ: ΜΟΝΟ ένα JSON αντικείμενο, χωρίς άλλο κείμενο:
+{{"emotional_tone": "...", "main_themes": ["..."], "suggested_style": "...", "confidence": 0.0, "edited": "[το κείμενο με ελάχιστο edit]", "comment": "[σχόλιο με βαθιά ενσυναίσθηση]"}}
+
+Αν είναι ΞΕΚΑΘΑΡΑ άσχετο, επέστρεψε: "Το κείμενο δεν είναι κατάλληλο."
+
+{context_section}
+
+Κείμενο: {text}
+
+Απάντηση:"""
     
     def is_sensitive_content(self, text: str) -> bool:
         """Check if content is sensitive and might need light editing for clarity/sensitivity"""
-        t = text.lower()
-        sensitive_keywords = [
-            'αμαξίδιο', 'αναπηρία', 'αναπηρικό', 'άτομο με', 'άτομα με',
-            'διάγνωση', 'ασθένεια', 'νοσεί', 'θεραπεία', 'φάρμακο',
-            'πόνος', 'δυσκολία', 'πρόβλημα', 'δύσκολο', 'δύσκολα',
-            'φοβάμαι', 'φοβία', 'άγχος', 'άγχος', 'στεναχώρια',
-            'μόνος', 'μόνη', 'μοναξιά', 'απομόνωση'
-        ]
-        return any(k in t for k in sensitive_keywords)
+        return keyword_classifier.classify(text)["sensitive"]
     
     def is_disturbing(self, text: str) -> bool:
         """Heuristic check for disturbing/explicit content that should be paraphrased/softened.
         This is conservative: only clear cases trigger paraphrase mode."""
-        t = text.lower()
-        keywords = [
-            # Greek
-            'αυτοκτον', 'δολοφον', 'βιασ', 'αιμα', 'αίμα', 'βια', 'βία', 'σφαγ', 'κορμι', 'πτώμα',
-            'βρισι', 'κατάρα', 'γαμ', 'πουστ', 'μαλ@@', 'ρεμάλι',
-            # English
-            'suicid', 'murder', 'rape', 'blood', 'kill', 'stab', 'dead body', 'corpse',
-            'fuck', 'shit', 'bitch', 'slur'
-        ]
-        return any(k in t for k in keywords)
+        return keyword_classifier.classify(text)["disturbing"]
 
     def is_relevant_content(self, text: str) -> bool:
         """Check if text is relevant for MS story transformation"""
-        # Only reject CLEARLY irrelevant content (news, politics, technical stuff)
-        irrelevant_keywords = [
-            'βουλή', 'βουλής', 'κυβέρνηση', 'υπουργός', 'πρωθυπουργός',
-            'εξεταστική', 'επιτροπή', 'σκάνδαλο', 'οπεκεπε',
-            'εκλογές', 'κόμμα', 'ψήφισμα', 'νομοσχέδιο',
-            'χρηματιστήριο', 'μετοχές', 'nasdaq', 'κατάθεση'
-        ]
-        
-        text_lower = text.lower()
-        
-        # Count irrelevant keywords
-        irrelevant_count = sum(1 for keyword in irrelevant_keywords if keyword in text_lower)
-        
-        # Only reject if text has MANY irrelevant keywords (clearly politics/news/business)
-        # This is much more permissive - allows most personal stories through
-        if irrelevant_count >= 3:
-            return False
-        
-        # Accept everything else - let the AI decide if it's appropriate
-        return True
+        # Only reject text with MANY irrelevant keywords (clearly politics/news/business);
+        # let the AI decide about everything else
+        return keyword_classifier.classify(text)["is_relevant"]
     
     def get_emoji_theme(self, text: str) -> dict:
         """Get emoji theme based on story content"""
-        # Simple keyword-based emoji selection
-        text_lower = text.lower()
-        
-        # Strength/Resilience themes
-        if any(word in text_lower for word in ['δυνατή', 'δυνατός', 'αντοχή', 'δύναμη', 'παλεύω', 'δεν τα παρατάω']):
-            return {
-                "theme": "strength",
-                "emojis": ["💪", "🔥", "⚡", "🏋️‍♀️", "💎"],
-                "color": "orange",
-                "animation": "bounce"
-            }
-        
-        # Love/Family themes
-        elif any(word in text_lower for word in ['αγάπη', 'οικογένεια', 'υποστήριξη', 'μαμά', 'μπαμπάς', 'παιδιά']):
+        theme = keyword_classifier.classify(text)["emoji_theme"]
+        return {**theme, "emojis": list(theme["emojis"])}
+    
+    def analyze_story(self, text: str, deadline: Optional[LLMDeadline] = None, hedge: bool = False) -> dict:
+        """Analyze story to determine best transformation approach"""
+        # First check if content is relevant
+        if not self.is_relevant_content(text):
             return {
-                "theme": "love",
-                "emojis": ["💝", "💕", "🌈", "🦋", "💖"],
-                "color": "pink",
-                "animation": "float"
-            }
-        
-        # Community themes
-        elif any(word in text_lower for word in ['μαζί', 'κοινότητα', 'φίλοι', 'υποστήριξη', 'αλληλεγγύη']):
-            return {
-                "theme": "community",
-                "emojis": ["🤝", "👥", "🌟", "💜", "🎯"],
-                "color": "blue",
-                "animation": "pulse"
-            }
-        
-        # Medical/Health themes
-        elif any(word in text_lower for word in ['γιατρός', 'θεραπεία', 'φάρμακο', 'νοσοκομείο', 'υγεία']):
-            return {
-                "theme": "medical",
-                "emojis": ["🏥", "⚕️", "💊", "🩺", "🌱"],
-                "color": "green",
-                "animation": "glow"
-            }
-        
-        # Success/Achievement themes
-        elif any(word in text_lower for word in ['επιτυχία', 'κέρδισα', 'κατάφερα', 'νίκη', 'πρόοδος']):
-            return {
-                "theme": "success",
-                "emojis": ["🎉", "🏆", "✨", "🌟", "🎯"],
-                "color": "gold",
-                "animation": "sparkle"
-            }
-        
-        # Default hope theme
-        else:
-            return {
-                "theme": "hope",
-                "emojis": ["🌟", "💜", "✨", "🌈", "🦋"],
-                "color": "purple",
-                "animation": "float"
-            }
-    
-    def analyze_story(self, text: str) -> dict:
-        """Analyze story to determine best transformation approach"""
-        # First check if content is relevant
-        if not self.is_relevant_content(text):
-            return {
-                "emotional_tone": "irrelevant",
-                "main_themes": ["irrelevant"],
-                "suggested_style": "inspirational",
-                "confidence": 0.1,
-                "is_relevant": False
+                "emotional_tone": "irrelevant",
+                "main_themes": ["irrelevant"],
+                "suggested_style": "inspirational",
+                "confidence": 0.1,
+                "is_relevant": False
             }
         
         analysis_prompt = f"""Ανάλυσε αυτό το κείμενο και επέστρεψε JSON με:
@@ -479,7 +1491,7 @@ class StoryTransformer:
 Κείμενο: {text[:200]}..."""
         
         try:
-            response_text = generate_with_fallback(analysis_prompt, temperature=0.1)
+            response_text = generate_with_fallback(analysis_prompt, temperature=0.1, deadline=deadline, hedge=hedge)
             # Try to parse JSON response
             try:
                 result = json.loads(response_text)
@@ -494,6 +1506,8 @@ class StoryTransformer:
                     "confidence": 0.8,
                     "is_relevant": True
                 }
+        except LLMDeadlineExceeded:
+            raise
         except Exception as e:
             print(f"⚠️ Story analysis failed: {e}")
             return {
@@ -507,45 +1521,188 @@ class StoryTransformer:
     def get_recent_stories_context(self, limit: int = 5) -> str:
         """Get recent approved stories as context for the LLM"""
         try:
-            conn = get_db()
-            cursor = execute_query(
-                conn,
-                "SELECT transformed_text, author_name FROM stories WHERE status = 'approved' ORDER BY COALESCE(moderated_at, created_at) DESC LIMIT ?",
-                (limit,)
-            )
-            stories = fetchall_dict(conn, cursor)
-            if is_postgres():
-                cursor.close()
-            conn.close()
-            
-            if not stories:
-                return ""
-            
-            context_parts = []
-            for story in stories:
-                author = story.get('author_name') or 'Ανώνυμος'
-                text = story.get('transformed_text', '')
-                context_parts.append(f"- {author}: \"{text}\"")
-            
-            return "\n".join(context_parts)
+            return recent_stories.render(limit)
         except Exception as e:
             print(f"⚠️ Error getting recent stories context: {e}")
             return ""
     
-    def generate_enhanced(self, text: str, style: str = None, recent_stories_context: str = None) -> dict:
-        """Generate enhanced transformation with quality metrics"""
-        analysis = self.analyze_story(text)
+    def irrelevant_result(self, analysis: dict) -> dict:
+        """Result returned when content is rejected before any generation"""
+        return {
+            "transformed_text": "❌ Το κείμενο δεν είναι κατάλληλο για μετασχηματισμό. Παρακαλώ εισάγετε μια προσωπική ιστορία σχετική με την Πολλαπλή Σκλήρυνση ή θέματα υγείας.",
+            "style_used": "none",
+            "quality_score": 0.0,
+            "analysis": analysis,
+            "success": False,
+            "error": "Irrelevant content"
+        }
+
+    def build_context_section(self, recent_stories_context: str = None) -> str:
+        """Format recent stories as the prompt context section"""
+        # Get recent stories context if not provided
+        if recent_stories_context is None:
+            recent_stories_context = self.get_recent_stories_context(limit=5)
         
-        # Check if content is relevant
-        if not analysis.get("is_relevant", True):
+        if recent_stories_context:
+            return f"ΠΡΟΗΓΟΥΜΕΝΕΣ ΙΣΤΟΡΙΕΣ (για context):\n{recent_stories_context}\n"
+        return ""
+
+    def parse_transformation_response(self, full_response: str) -> tuple:
+        """Split an ΕΠΕΞΕΡΓΑΣΜΕΝΟ/ΣΧΟΛΙΟ response into (edited text, comment)"""
+        transformed_text = ""
+        llm_comment = ""
+        
+        # Look for the separator pattern
+        if "---" in full_response or "ΣΧΟΛΙΟ:" in full_response:
+            parts = re.split(r'---|ΣΧΟΛΙΟ:', full_response, maxsplit=1)
+            if len(parts) >= 1:
+                # Extract edited text (remove "ΕΠΕΞΕΡΓΑΣΜΕΝΟ:" prefix if present)
+                edited_part = parts[0].strip()
+                if "ΕΠΕΞΕΡΓΑΣΜΕΝΟ:" in edited_part:
+                    edited_part = edited_part.split("ΕΠΕΞΕΡΓΑΣΜΕΝΟ:", 1)[1].strip()
+                transformed_text = edited_part
+            
+            if len(parts) >= 2:
+                # Extract comment
+                comment_part = parts[1].strip()
+                llm_comment = comment_part
+        else:
+            # Fallback: if no separator, treat entire response as edited text
+            transformed_text = full_response
+            llm_comment = ""
+        
+        return transformed_text, llm_comment
+
+    def generate_single_pass(self, text: str, recent_stories_context: str = None,
+                             deadline: Optional[LLMDeadline] = None, hedge: bool = False) -> dict:
+        """Analyze, edit and comment on a story with a single structured LLM call"""
+        if not self.is_relevant_content(text):
+            return self.irrelevant_result(self.analyze_story(text))
+        
+        if self.is_disturbing(text):
+            edit_section = ("ΕΠΕΞΕΡΓΑΣΙΑ\n"
+                            "Παραφράσέ το ώστε να αφαιρεθεί ωμή/προσβλητική/βίαιη γλώσσα. Κράτα το νόημα, τη φωνή και το ύφος. ΜΗΝ προσθέτεις νέα γεγονότα.")
+        else:
+            edit_section = ("ΕΛΑΦΡΥ EDITING\n"
+                            "Κάνε ΜΟΝΟ ορθογραφικές/γραμματικές διορθώσεις. ΚΡΑΤΑ ΑΚΡΙΒΩΣ το ύφος, τη φωνή και όλες τις λέξεις. Αν δεν υπάρχουν λάθη, επέστρεψε το ΑΚΡΙΒΩΣ όπως είναι.")
+        
+        formatted_prompt = self.single_pass_prompt.format(
+            edit_section=edit_section,
+            context_section=self.build_context_section(recent_stories_context),
+            text=text.strip()
+        )
+        
+        analysis = {
+            "emotional_tone": "hopeful",
+            "main_themes": ["struggle", "hope"],
+            "suggested_style": "inspirational",
+            "confidence": 0.8,
+            "is_relevant": True
+        }
+        
+        try:
+            full_response = generate_with_fallback(formatted_prompt, temperature=0.2, max_tokens=1536,
+                                           deadline=deadline, hedge=hedge)
+            
+            # Check if AI refused to transform
+            if "δεν είναι κατάλληλο" in full_response.lower():
+                return {
+                    "transformed_text": full_response,
+                    "llm_comment": "",
+                    "style_used": analysis["suggested_style"],
+                    "quality_score": 0.0,
+                    "analysis": analysis,
+                    "success": False,
+                    "error": "AI rejected transformation"
+                }
+            
+            # Strip markdown code fences and parse the JSON object
+            match = re.search(r'\{.*\}', full_response, flags=re.DOTALL)
+            try:
+                data = json.loads(match.group(0)) if match else None
+            except json.JSONDecodeError:
+                data = None
+            
+            if isinstance(data, dict) and data.get("edited"):
+                for key in ("emotional_tone", "main_themes", "suggested_style", "confidence"):
+                    if data.get(key) is not None:
+                        analysis[key] = data[key]
+                if analysis["suggested_style"] not in self.prompts:
+                    analysis["suggested_style"] = "inspirational"
+                transformed_text = str(data["edited"]).strip()
+                llm_comment = str(data.get("comment") or "").strip()
+            elif "ΕΠΕΞΕΡΓΑΣΜΕΝΟ:" in full_response or "ΣΧΟΛΙΟ:" in full_response:
+                # Model ignored the JSON format - fall back to the text format parser
+                print("⚠️ Single-pass response was not valid JSON, parsing as text")
+                transformed_text, llm_comment = self.parse_transformation_response(full_response)
+            else:
+                # Truncated or unstructured reply: the raw text must not be
+                # saved as a story or cached
+                print(f"⚠️ Unusable single-pass response: {full_response[:200]!r}")
+                return {
+                    "transformed_text": "⚠️ Σφάλμα μετασχηματισμού. Παρακαλώ δοκιμάστε ξανά.",
+                    "llm_comment": "",
+                    "style_used": "fallback",
+                    "quality_score": 0.0,
+                    "analysis": analysis,
+                    "success": False,
+                    "error": "Malformed transformation response"
+                }
+            
             return {
-                "transformed_text": "❌ Το κείμενο δεν είναι κατάλληλο για μετασχηματισμό. Παρακαλώ εισάγετε μια προσωπική ιστορία σχετική με την Πολλαπλή Σκλήρυνση ή θέματα υγείας.",
-                "style_used": "none",
+                "transformed_text": transformed_text,
+                "llm_comment": llm_comment,
+                "style_used": analysis["suggested_style"],
+                "quality_score": self.assess_quality(text, transformed_text),
+                "analysis": analysis,
+                "success": True
+            }
+        except LLMDeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"❌ Transformation failed: {e}")
+            return {
+                "transformed_text": "⚠️ Σφάλμα μετασχηματισμού. Παρακαλώ δοκιμάστε ξανά.",
+                "llm_comment": "",
+                "style_used": "fallback",
                 "quality_score": 0.0,
                 "analysis": analysis,
                 "success": False,
-                "error": "Irrelevant content"
+                "error": str(e)
             }
+    
+    def generate_enhanced(self, text: str, style: str = None, recent_stories_context: str = None,
+                          deadline: Optional[LLMDeadline] = None, hedge: bool = False) -> dict:
+        """Generate enhanced transformation, served from the cache when possible"""
+        if recent_stories_context is None:
+            recent_stories_context = self.get_recent_stories_context(limit=5)
+        
+        prompt_variant = f"sensitive={self.is_sensitive_content(text)}|disturbing={self.is_disturbing(text)}"
+        cache_style = style or ("auto:single" if LLM_SINGLE_PASS else "auto")
+        cache_key = transformation_cache.make_key(text, cache_style, prompt_variant, recent_stories_context)
+        
+        cached = transformation_cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "cached": True}
+        
+        result = self.generate_uncached(text, style, recent_stories_context, deadline, hedge)
+        # Only successful transformations are worth keeping
+        if result.get("success"):
+            transformation_cache.put(cache_key, result)
+        return result
+    
+    def generate_uncached(self, text: str, style: str = None, recent_stories_context: str = None,
+                          deadline: Optional[LLMDeadline] = None, hedge: bool = False) -> dict:
+        """Generate enhanced transformation with quality metrics"""
+        # Without an explicit style, analysis and transformation can share one call
+        if not style and LLM_SINGLE_PASS:
+            return self.generate_single_pass(text, recent_stories_context, deadline, hedge)
+        
+        analysis = self.analyze_story(text, deadline, hedge)
+        
+        # Check if content is relevant
+        if not analysis.get("is_relevant", True):
+            return self.irrelevant_result(analysis)
         
         # Choose style based on analysis or user preference
         if not style:
@@ -554,15 +1711,8 @@ class StoryTransformer:
         # Use the selected style prompt - each has different focus but same core rules
         prompt = self.prompts.get(style, self.prompts['inspirational'])
         
-        # Get recent stories context if not provided
-        if recent_stories_context is None:
-            recent_stories_context = self.get_recent_stories_context(limit=5)
-        
         # Format context section
-        if recent_stories_context:
-            context_section = f"ΠΡΟΗΓΟΥΜΕΝΕΣ ΙΣΤΟΡΙΕΣ (για context):\n{recent_stories_context}\n"
-        else:
-            context_section = ""
+        context_section = self.build_context_section(recent_stories_context)
         
         # Check if content is sensitive - if not, emphasize even more minimal editing
         is_sensitive = self.is_sensitive_content(text)
@@ -604,7 +1754,7 @@ class StoryTransformer:
         
         try:
             # First attempt with fallback
-            full_response = generate_with_fallback(formatted_prompt, temperature=0.2)
+            full_response = generate_with_fallback(formatted_prompt, temperature=0.2, deadline=deadline, hedge=hedge)
 
             # Check if AI refused to transform
             if "δεν είναι κατάλληλο" in full_response.lower():
@@ -619,27 +1769,7 @@ class StoryTransformer:
                 }
 
             # Parse the response to separate edited text and comment
-            transformed_text = ""
-            llm_comment = ""
-            
-            # Look for the separator pattern
-            if "---" in full_response or "ΣΧΟΛΙΟ:" in full_response:
-                parts = re.split(r'---|ΣΧΟΛΙΟ:', full_response, maxsplit=1)
-                if len(parts) >= 1:
-                    # Extract edited text (remove "ΕΠΕΞΕΡΓΑΣΜΕΝΟ:" prefix if present)
-                    edited_part = parts[0].strip()
-                    if "ΕΠΕΞΕΡΓΑΣΜΕΝΟ:" in edited_part:
-                        edited_part = edited_part.split("ΕΠΕΞΕΡΓΑΣΜΕΝΟ:", 1)[1].strip()
-                    transformed_text = edited_part
-                
-                if len(parts) >= 2:
-                    # Extract comment
-                    comment_part = parts[1].strip()
-                    llm_comment = comment_part
-            else:
-                # Fallback: if no separator, treat entire response as edited text
-                transformed_text = full_response
-                llm_comment = ""
+            transformed_text, llm_comment = self.parse_transformation_response(full_response)
 
             # Quality & fidelity check (just for monitoring, not for retry)
             quality_score = self.assess_quality(text, transformed_text)
@@ -652,6 +1782,8 @@ class StoryTransformer:
                 "analysis": analysis,
                 "success": True
             }
+        except LLMDeadlineExceeded:
+            raise
         except Exception as e:
             print(f"❌ Transformation failed: {e}")
             # Fallback to original text
@@ -667,77 +1799,539 @@ class StoryTransformer:
     
     def assess_quality(self, original: str, transformed: str) -> float:
         """Assess quality of transformation (0-1)"""
-        # Simple quality + fidelity metrics (token overlap)
-        def tokenize(text: str) -> set:
-            import re
-            # Use Unicode-aware word matching without \p classes (not supported by re)
-            tokens = re.findall(r"[\w']+", text.lower(), flags=re.UNICODE)
-            stop = {
-                'και','το','τα','τι','να','που','σε','στη','στην','στο','στον','για','με','από','δε','δεν','μη','μην','είναι','ή','θα','ως','ως','ένα','μία','μια','ο','η','οι','των','των'
-            }
-            return {t for t in tokens if t not in stop and len(t) > 2}
-
-        orig = tokenize(original)
-        trans = tokenize(transformed)
-        overlap = len(orig & trans) / max(len(orig) or 1, 1)
+        return quality_scorer.score(original, transformed)
 
-        length_ratio = len(transformed) / max(len(original), 1)
-        is_appropriate_length = 50 <= len(transformed) <= 300
-
-        score = 0.0
-        # Fidelity contributes most
-        if overlap >= 0.15:
-            score += 0.5
-        elif overlap >= 0.08:
-            score += 0.3
-
-        # Length sanity
-        if 0.3 <= length_ratio <= 1.5:
-            score += 0.25
-        if is_appropriate_length:
-            score += 0.25
+transformer = StoryTransformer()
 
-        return min(score, 1.0)
+# Every socket gets a bounded outbound queue drained by its own writer task,
+# so a broadcast only enqueues and never waits on a slow client. A client
+# whose queue fills up, or whose send takes longer than WS_SEND_TIMEOUT, is
+# closed and evicted; the frontends reconnect and reload their state.
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", 64))
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", 10))
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def encode_message(message: dict) -> str:
+    """Encode a WebSocket message to a text frame, with orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(message, default=json_default).decode()
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=json_default)
+
+class ClientConnection:
+    """One WebSocket client with its outbound queue and writer task"""
+
+    def __init__(self, websocket: WebSocket, manager: "ConnectionManager"):
+        self.websocket = websocket
+        self.manager = manager
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self.sent = 0
+        self.writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, frame: str) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
 
-transformer = StoryTransformer()
+    async def _write_loop(self):
+        while True:
+            frame = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(frame), WS_SEND_TIMEOUT)
+                self.sent += 1
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                await self.manager.evict(self, "send timed out")
+                return
+            except Exception as e:
+                await self.manager.evict(self, f"send failed: {e}")
+                return
 
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.moderator_connections: List[WebSocket] = []
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self.moderator_connections: Dict[WebSocket, ClientConnection] = {}
+        self.evicted = 0
+        # Broadcast instrumentation: each message is encoded once, however
+        # many clients receive it
+        self.broadcasts = 0
+        self.encode_seconds = 0.0
+        self.last_encode_seconds = 0.0
+        self.last_frame_bytes = 0
+        self.bytes_queued = 0
     
     async def connect(self, websocket: WebSocket, is_moderator: bool = False):
         await websocket.accept()
-        if is_moderator:
-            self.moderator_connections.append(websocket)
-        else:
-            self.active_connections.append(websocket)
+        self.register(websocket, is_moderator)
+    
+    def register(self, websocket: WebSocket, is_moderator: bool = False):
+        """Start delivering broadcasts to an accepted socket"""
+        connections = self.moderator_connections if is_moderator else self.active_connections
+        connections[websocket] = ClientConnection(websocket, self)
     
     def disconnect(self, websocket: WebSocket, is_moderator: bool = False):
-        if is_moderator:
-            if websocket in self.moderator_connections:
-                self.moderator_connections.remove(websocket)
-        else:
-            if websocket in self.active_connections:
-                self.active_connections.remove(websocket)
+        connections = self.moderator_connections if is_moderator else self.active_connections
+        client = connections.pop(websocket, None)
+        if client and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+    
+    async def evict(self, client: ClientConnection, reason: str):
+        """Drop a slow or dead client and close its socket"""
+        is_moderator = client.websocket in self.moderator_connections
+        if client.websocket not in self.moderator_connections and client.websocket not in self.active_connections:
+            return
+        self.disconnect(client.websocket, is_moderator=is_moderator)
+        self.evicted += 1
+        print(f"⚠️ Dropping {'moderator' if is_moderator else 'display'} socket: {reason}")
+        try:
+            # 1013 "try again later": the client reconnects and reloads
+            await asyncio.wait_for(client.websocket.close(code=1013), 1)
+        except Exception:
+            pass
+    
+    def send(self, websocket: WebSocket, message: dict):
+        """Queue a message for one client, behind anything already queued for it"""
+        self.send_frame(websocket, encode_message(message))
+    
+    def send_frame(self, websocket: WebSocket, frame: str):
+        client = self.active_connections.get(websocket) or self.moderator_connections.get(websocket)
+        if client:
+            self._enqueue(client, frame)
+    
+    def _enqueue(self, client: ClientConnection, frame: str):
+        if not client.enqueue(frame):
+            asyncio.create_task(self.evict(client, "send queue full"))
+    
+    def encode(self, message: dict) -> str:
+        """Encode a broadcast once, recording how long it took and its size"""
+        started = time.perf_counter()
+        frame = encode_message(message)
+        elapsed = time.perf_counter() - started
+        self.broadcasts += 1
+        self.encode_seconds += elapsed
+        self.last_encode_seconds = elapsed
+        self.last_frame_bytes = len(frame.encode())
+        return frame
+    
+    def deliver(self, connections: Dict[WebSocket, ClientConnection], frame: str):
+        """Queue an encoded frame for every client of this worker"""
+        clients = list(connections.values())
+        self.bytes_queued += len(frame.encode()) * len(clients)
+        for client in clients:
+            self._enqueue(client, frame)
     
     async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                print(f"⚠️ Broadcast error: {e}")
-                pass
+        await event_bus.publish("displays", self.encode(message))
     
     async def notify_moderators(self, message: dict):
-        for connection in self.moderator_connections:
+        await event_bus.publish("moderators", self.encode(message))
+    
+    def snapshot(self) -> dict:
+        return {
+            "displays": len(self.active_connections),
+            "moderators": len(self.moderator_connections),
+            "queued": sum(c.queue.qsize() for c in self.active_connections.values())
+                      + sum(c.queue.qsize() for c in self.moderator_connections.values()),
+            "evicted": self.evicted,
+            "broadcasts": self.broadcasts,
+            "encoder": "orjson" if orjson is not None else "json",
+            "avg_encode_us": round(self.encode_seconds / self.broadcasts * 1e6, 1) if self.broadcasts else None,
+            "last_encode_us": round(self.last_encode_seconds * 1e6, 1),
+            "last_frame_bytes": self.last_frame_bytes,
+            "bytes_queued": self.bytes_queued,
+            "queue_size": WS_SEND_QUEUE_SIZE,
+            "send_timeout": WS_SEND_TIMEOUT
+        }
+
+manager = ConnectionManager()
+
+def insert_story(original_text: str, transformed_text: str, llm_comment: str,
+                 author_name: Optional[str], emoji_theme: dict) -> dict:
+    """Insert a pending story and return the stored row"""
+    conn = get_db()
+    try:
+        cursor = execute_query(
+            conn,
+            "INSERT INTO stories (original_text, transformed_text, llm_comment, author_name, status, emoji_theme, emoji_data) VALUES (?, ?, ?, ?, 'pending', ?, ?) RETURNING id" if is_postgres() else "INSERT INTO stories (original_text, transformed_text, llm_comment, author_name, status, emoji_theme, emoji_data) VALUES (?, ?, ?, ?, 'pending', ?, ?)",
+            (original_text, transformed_text, llm_comment, author_name, emoji_theme['theme'], json.dumps(emoji_theme))
+        )
+        if is_postgres():
+            story_id = cursor.fetchone()['id']
+            conn.commit()
+            cursor.close()
+        else:
+            story_id = cursor.lastrowid
+            conn.commit()
+        
+        cursor = execute_query(conn, "SELECT * FROM stories WHERE id = ?", (story_id,))
+        story = fetchone_dict(conn, cursor)
+        if is_postgres():
+            cursor.close()
+        return story
+    finally:
+        conn.close()
+
+def apply_moderation(story_id: int, new_status: str, moderator_name: Optional[str]) -> Optional[tuple]:
+    """Set a story's moderation status.
+
+    Returns (previous status, updated row), or None if the story does not
+    exist. The update is conditional on the status read first, so two
+    moderators acting on the same story cannot both count a transition.
+    """
+    conn = get_db()
+    try:
+        while True:
+            cursor = execute_query(conn, "SELECT status FROM stories WHERE id = ?", (story_id,))
+            current = fetchone_dict(conn, cursor)
+            if is_postgres():
+                cursor.close()
+            if not current:
+                return None
+            
+            cursor = execute_query(
+                conn,
+                "UPDATE stories SET status = ?, moderated_at = CURRENT_TIMESTAMP, moderated_by = ? WHERE id = ? AND status = ?",
+                (new_status, moderator_name, story_id, current["status"])
+            )
+            updated = cursor.rowcount
+            conn.commit()
+            if is_postgres():
+                cursor.close()
+            if updated:
+                break
+        
+        cursor = execute_query(conn, "SELECT * FROM stories WHERE id = ?", (story_id,))
+        story = fetchone_dict(conn, cursor)
+        if is_postgres():
+            cursor.close()
+        return current["status"], story
+    finally:
+        conn.close()
+
+def count_stories_by_status() -> dict:
+    """Story counts per status in a single GROUP BY"""
+    rows = query_all("SELECT status, COUNT(*) as count FROM stories GROUP BY status")
+    return {row["status"]: row["count"] for row in rows}
+
+class StoryCounters:
+    """In-memory story counts, seeded once from the database and kept up to
+    date by submit_story/moderate_story, so stats never hit the database."""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def seed(self, counts: dict):
+        with self._lock:
+            self._counts = dict(counts)
+
+    def record_insert(self, status: str):
+        with self._lock:
+            self._counts[status] = self._counts.get(status, 0) + 1
+
+    def record_transition(self, old_status: str, new_status: str):
+        if old_status == new_status:
+            return
+        with self._lock:
+            self._counts[old_status] = max(self._counts.get(old_status, 0) - 1, 0)
+            self._counts[new_status] = self._counts.get(new_status, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "total_submissions": sum(self._counts.values()),
+                "approved": self._counts.get("approved", 0),
+                "pending": self._counts.get("pending", 0),
+                "rejected": self._counts.get("rejected", 0)
+            }
+
+story_counters = StoryCounters()
+
+def push_stats():
+    """Push the current counts to this worker's display and moderator sockets"""
+    frame = manager.encode({"type": "stats", "data": story_counters.snapshot()})
+    manager.deliver(manager.active_connections, frame)
+    manager.deliver(manager.moderator_connections, frame)
+
+# Display events (new_story, clear_display) carry a per-worker sequence
+# number and are kept in a bounded log. A reconnecting display sends the
+# epoch and last seq it saw and only the missed frames are replayed; when the
+# gap is no longer in the log (or it reconnected to another worker) it gets
+# a "reset" with the latest stories from the database instead.
+DISPLAY_REPLAY_SIZE = int(os.getenv("DISPLAY_REPLAY_SIZE", 256))
+DISPLAY_RESET_STORIES = int(os.getenv("DISPLAY_RESET_STORIES", 20))
+DISPLAY_RESUME_WAIT = float(os.getenv("DISPLAY_RESUME_WAIT", 2))
+
+class DisplayEventLog:
+    """Sequence numbers and a bounded replay log for display frames"""
+
+    def __init__(self, size: int):
+        self.epoch = os.urandom(4).hex()
+        self.seq = 0
+        self._frames = deque(maxlen=size)
+        self.replays = 0
+        self.resets = 0
+
+    def append(self, frame: str) -> str:
+        """Stamp an encoded frame with the next seq and remember it"""
+        self.seq += 1
+        sequenced = f'{{"seq":{self.seq},' + frame[1:]
+        self._frames.append((self.seq, sequenced))
+        return sequenced
+
+    def since(self, epoch: Optional[str], last_seq) -> Optional[List[str]]:
+        """Frames after last_seq, or None when they can no longer be replayed"""
+        if epoch != self.epoch or not isinstance(last_seq, int) or last_seq > self.seq:
+            return None
+        if last_seq == self.seq:
+            return []
+        if not self._frames or self._frames[0][0] > last_seq + 1:
+            return None
+        return [frame for seq, frame in self._frames if seq > last_seq]
+
+    def snapshot(self) -> dict:
+        return {"epoch": self.epoch, "seq": self.seq, "logged": len(self._frames),
+                "replays": self.replays, "resets": self.resets}
+
+display_log = DisplayEventLog(DISPLAY_REPLAY_SIZE)
+
+# Socket broadcasts, counter changes and recent-story updates go through an
+# event bus so that every worker process sees them. Topics:
+#   displays / moderators  an encoded frame for that worker's sockets
+#   counters               {"insert": status} or {"transition": [old, new]}
+#   recent                 {"add": story} or {"discard": story_id}
+# A single process uses LocalEventBus, which dispatches in place; with
+# DATABASE_URL set, PostgresEventBus fans events out with LISTEN/NOTIFY.
+EVENT_BUS = os.getenv("EVENT_BUS", "postgres" if USE_POSTGRES else "local")
+EVENT_BUS_CHANNEL = os.getenv("EVENT_BUS_CHANNEL", "story_events")
+NOTIFY_MAX_BYTES = 7000  # NOTIFY payloads must stay under 8000 bytes
+
+class DataVersion:
+    """Version of the story data, bumped on every insert, moderation and resync.
+
+    It is exposed as an ETag (per process, so another worker never answers
+    304 for a version it didn't serve) and Last-Modified on the listing and
+    stats endpoints; a matching If-None-Match gets a 304 without any query.
+    """
+
+    def __init__(self):
+        self.epoch = os.urandom(4).hex()
+        self.version = 0
+        self.modified = datetime.now(timezone.utc)
+
+    def bump(self):
+        self.version += 1
+        self.modified = datetime.now(timezone.utc)
+
+    def headers(self) -> dict:
+        return {
+            "ETag": f'W/"{self.epoch}-{self.version}"',
+            "Last-Modified": format_datetime(self.modified, usegmt=True),
+            "Cache-Control": "no-cache"
+        }
+
+data_version = DataVersion()
+
+def check_data_version(request: Request, response: Response) -> Optional[Response]:
+    """Return a 304 if the client already has the current version, else tag the response"""
+    # Read before the data is queried, so a concurrent change only makes the tag older
+    headers = data_version.headers()
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in tags or headers["ETag"] in tags or headers["ETag"][2:] in tags:
+            return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+async def dispatch_event(topic: str, payload: str):
+    """Apply an event from the bus to this worker"""
+    if topic == "displays":
+        manager.deliver(manager.active_connections, display_log.append(payload))
+    elif topic == "moderators":
+        manager.deliver(manager.moderator_connections, payload)
+    elif topic == "counters":
+        change = json.loads(payload)
+        if "insert" in change:
+            story_counters.record_insert(change["insert"])
+        else:
+            story_counters.record_transition(*change["transition"])
+        data_version.bump()
+        push_stats()
+    elif topic == "recent":
+        change = json.loads(payload)
+        if "add" in change:
+            recent_stories.add(change["add"])
+        else:
+            await run_db(recent_stories.discard, change["discard"])
+    elif topic == "resync":
+        # Events may have been missed while the bus was down
+        story_counters.seed(await run_db(count_stories_by_status))
+        await run_db(recent_stories.load)
+        data_version.bump()
+        push_stats()
+
+class LocalEventBus:
+    """In-process bus for a single worker: events are dispatched immediately"""
+
+    name = "local"
+
+    def __init__(self):
+        self.handler = None
+        self.published = 0
+
+    async def start(self, handler):
+        self.handler = handler
+
+    async def publish(self, topic: str, payload: str):
+        self.published += 1
+        await self.handler(topic, payload)
+
+    async def stop(self):
+        pass
+
+    def snapshot(self) -> dict:
+        return {"backend": self.name, "published": self.published}
+
+class PostgresEventBus:
+    """Cross-process bus over Postgres LISTEN/NOTIFY.
+
+    Every worker LISTENs on one channel with a dedicated connection watched
+    by the event loop, and publishes with pg_notify on a pooled connection.
+    Events larger than a NOTIFY payload are split into numbered chunks and
+    reassembled by the listeners. After the listening connection drops, it
+    reconnects and dispatches a "resync" event to reload derived state.
+    """
+
+    name = "postgres"
+
+    def __init__(self, database_url: str, channel: str):
+        self.database_url = database_url
+        self.channel = channel
+        self.origin = os.urandom(4).hex()
+        self.handler = None
+        self.conn = None
+        self._sequence = 0
+        self._partial = {}
+        self._stopping = False
+        self.stats = {"published": 0, "received": 0, "chunks": 0, "reconnects": 0}
+
+    async def start(self, handler):
+        self.handler = handler
+        await self._listen()
+
+    async def _listen(self):
+        self.conn = await asyncio.get_running_loop().run_in_executor(db_executor, self._connect)
+        asyncio.get_running_loop().add_reader(self.conn.fileno(), self._on_readable)
+
+    def _connect(self):
+        conn = psycopg2.connect(self.database_url)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.channel}")
+        return conn
+
+    def _on_readable(self):
+        try:
+            self.conn.poll()
+        except psycopg2.Error as e:
+            print(f"⚠️ Event bus connection lost: {e}")
+            asyncio.get_running_loop().remove_reader(self.conn.fileno())
+            asyncio.create_task(self._reconnect())
+            return
+        while self.conn.notifies:
+            self._receive(self.conn.notifies.pop(0).payload)
+
+    async def _reconnect(self):
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+        while not self._stopping:
+            await asyncio.sleep(1)
             try:
-                await connection.send_json(message)
+                await self._listen()
             except Exception as e:
-                print(f"⚠️ Moderator notification error: {e}")
-                pass
+                print(f"⚠️ Event bus reconnect failed: {e}")
+                continue
+            self.stats["reconnects"] += 1
+            await self.handler("resync", "")
+            return
+
+    def _receive(self, payload: str):
+        header, _, chunk = payload.partition("|")
+        message_id, index, total = header.rsplit(":", 2)
+        index, total = int(index), int(total)
+        if total == 1:
+            body = chunk
+        else:
+            parts = self._partial.setdefault(message_id, [time.monotonic(), {}])
+            parts[1][index] = chunk
+            if len(parts[1]) < total:
+                self._drop_stale_partials()
+                return
+            del self._partial[message_id]
+            body = "".join(parts[1][i] for i in range(total))
+        self.stats["received"] += 1
+        topic, _, event = body.partition("\n")
+        asyncio.create_task(self.handler(topic, event))
+
+    def _drop_stale_partials(self):
+        cutoff = time.monotonic() - 30
+        for message_id in [m for m, parts in self._partial.items() if parts[0] < cutoff]:
+            del self._partial[message_id]
+
+    def _chunks(self, body: str) -> List[str]:
+        chunks, current, size = [], [], 0
+        for char in body:
+            width = len(char.encode())
+            if size + width > NOTIFY_MAX_BYTES:
+                chunks.append("".join(current))
+                current, size = [], 0
+            current.append(char)
+            size += width
+        chunks.append("".join(current))
+        return chunks
+
+    def _notify(self, payloads: List[str]):
+        conn = get_db()
+        try:
+            for payload in payloads:
+                execute_query(conn, "SELECT pg_notify(?, ?)", (self.channel, payload))
+            conn.commit()
+        finally:
+            conn.close()
 
-manager = ConnectionManager()
+    async def publish(self, topic: str, payload: str):
+        self._sequence += 1
+        message_id = f"{self.origin}-{self._sequence}"
+        body = f"{topic}\n{payload}"
+        chunks = [body] if len(body.encode()) <= NOTIFY_MAX_BYTES else self._chunks(body)
+        payloads = [f"{message_id}:{i}:{len(chunks)}|{chunk}" for i, chunk in enumerate(chunks)]
+        await run_db(self._notify, payloads)
+        self.stats["published"] += 1
+        self.stats["chunks"] += len(chunks)
+
+    async def stop(self):
+        self._stopping = True
+        if self.conn is not None and not self.conn.closed:
+            asyncio.get_running_loop().remove_reader(self.conn.fileno())
+            self.conn.close()
+
+    def snapshot(self) -> dict:
+        return {"backend": self.name, "channel": self.channel, "origin": self.origin,
+                "pending_chunks": len(self._partial), **self.stats}
+
+if EVENT_BUS == "postgres":
+    event_bus = PostgresEventBus(DATABASE_URL, EVENT_BUS_CHANNEL)
+else:
+    event_bus = LocalEventBus()
 
 class StorySubmission(BaseModel):
     text: str
@@ -752,138 +2346,486 @@ class ModerationAction(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    story_counters.seed(await run_db(count_stories_by_status))
+    await run_db(recent_stories.load)
+    await event_bus.start(dispatch_event)
     print("✅ Database initialized")
     
     # Start automatic backup task (every 6 hours)
     asyncio.create_task(periodic_backup())
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await event_bus.stop()
+    llm_executor.shutdown(wait=False, cancel_futures=True)
+    hedge_executor.shutdown(wait=False, cancel_futures=True)
+    db_executor.shutdown(wait=False, cancel_futures=True)
+    audio_executor.shutdown(wait=False, cancel_futures=True)
+    speech_executor.shutdown(wait=False, cancel_futures=True)
+    db_pool.close_all()
+
+# Backups are consistent snapshots written to BACKUP_DIR as gzip files with
+# a sha256sum sidecar; only the newest BACKUP_KEEP are kept. SQLite uses the
+# online backup API, copying BACKUP_PAGES pages per step so writers are never
+# blocked for long; Postgres gets a COPY-based data dump that psql can load
+# into a schema created by the migrations. The dump names its columns, since
+# their order differs between databases that got llm_comment by ALTER TABLE
+# and those created by migration 1.
+BACKUP_DIR = Path(os.getenv("BACKUP_DIR", "backups"))
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", 10))
+BACKUP_INTERVAL = float(os.getenv("BACKUP_INTERVAL", 6 * 60 * 60))
+BACKUP_PAGES = int(os.getenv("BACKUP_PAGES", 256))
+BACKUP_TABLES = {
+    "stories": ["id", "original_text", "transformed_text", "llm_comment", "author_name", "status",
+                "created_at", "moderated_at", "moderated_by", "emoji_theme", "emoji_data"],
+}
+
+class BackupStore:
+    """Creates, lists and prunes compressed, checksummed database backups"""
+
+    def __init__(self, directory: Path, keep: int):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def create(self) -> dict:
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            if is_postgres():
+                path = self.directory / f"stories_backup_{stamp}.sql.gz"
+                self._dump_postgres(path)
+            else:
+                path = self.directory / f"stories_backup_{stamp}.db.gz"
+                self._backup_sqlite(path)
+            checksum = self._checksum(path)
+            Path(f"{path}.sha256").write_text(f"{checksum}  {path.name}\n")
+            self._prune()
+            print(f"✅ Database backed up to {path}")
+            return self._describe(path)
+
+    def _backup_sqlite(self, path: Path):
+        snapshot = path.with_suffix(".tmp")
+        source = sqlite3.connect(SQLITE_PATH)
+        target = sqlite3.connect(snapshot)
+        try:
+            source.backup(target, pages=BACKUP_PAGES, sleep=0.001)
+        finally:
+            target.close()
+            source.close()
+        try:
+            with open(snapshot, "rb") as raw, gzip.open(path, "wb") as compressed:
+                shutil.copyfileobj(raw, compressed, 1024 * 1024)
+        finally:
+            snapshot.unlink()
+
+    def _dump_postgres(self, path: Path):
+        conn = get_db()
+        try:
+            cursor = conn.cursor()
+            # One repeatable-read transaction so every table comes from the same snapshot
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            with gzip.open(path, "wt", encoding="utf-8") as out:
+                out.write(f"-- Story Transformer data dump {datetime.now().isoformat()}\n")
+                for table, columns in BACKUP_TABLES.items():
+                    column_list = ", ".join(columns)
+                    out.write(f"COPY {table} ({column_list}) FROM stdin;\n")
+                    cursor.copy_expert(f"COPY {table} ({column_list}) TO STDOUT", out)
+                    out.write("\\.\n")
+                out.write("SELECT setval('stories_id_seq', COALESCE((SELECT MAX(id) FROM stories), 1));\n")
+            cursor.close()
+        finally:
+            conn.rollback()
+            conn.close()
+
+    def _checksum(self, path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _backups(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(p for p in self.directory.glob("stories_backup_*.gz"))
+
+    def _prune(self):
+        for old in self._backups()[:-self.keep] if self.keep > 0 else []:
+            old.unlink(missing_ok=True)
+            Path(f"{old}.sha256").unlink(missing_ok=True)
+
+    def _describe(self, path: Path) -> dict:
+        sidecar = Path(f"{path}.sha256")
+        stat = path.stat()
+        return {
+            "name": path.name,
+            "size": stat.st_size,
+            "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            "sha256": sidecar.read_text().split()[0] if sidecar.exists() else None
+        }
+
+    def list(self) -> List[dict]:
+        return [self._describe(path) for path in reversed(self._backups())]
+
+    def path(self, name: str) -> Optional[Path]:
+        """Resolve a backup by name, only among existing backups"""
+        for path in self._backups():
+            if path.name == name:
+                return path
+        return None
+
+backup_store = BackupStore(BACKUP_DIR, BACKUP_KEEP)
+
 async def periodic_backup():
-    """Automatically backup database every 6 hours"""
+    """Automatically back up the database every BACKUP_INTERVAL seconds"""
     while True:
-        await asyncio.sleep(6 * 60 * 60)  # 6 hours
+        await asyncio.sleep(BACKUP_INTERVAL)
         try:
-            backup_db()
+            await run_db(backup_store.create)
             print("✅ Automatic database backup completed")
         except Exception as e:
             print(f"⚠️ Backup failed: {e}")
 
-def backup_db():
-    """Create a backup of the database"""
-    try:
-        import shutil
-        db_path = 'stories.db'
-        if not os.path.exists(db_path):
-            print("⚠️ No database file to backup")
-            return None
-        backup_path = f"stories_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-        shutil.copy2(db_path, backup_path)
-        print(f"✅ Database backed up to {backup_path}")
-        return backup_path
-    except Exception as e:
-        print(f"❌ Backup error: {e}")
-        raise
+def backup_response(backup: dict) -> FileResponse:
+    return FileResponse(
+        backup_store.path(backup["name"]),
+        media_type='application/gzip',
+        filename=backup["name"],
+        headers={"X-Checksum-SHA256": backup["sha256"]}
+    )
 
 @app.get("/api/backup")
 async def download_backup():
-    """Download current database as backup"""
+    """Take a fresh backup and stream it as a download"""
     try:
-        backup_path = backup_db()
-        return FileResponse(
-            backup_path,
-            media_type='application/octet-stream',
-            filename=f"stories_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-        )
+        backup = await run_db(backup_store.create)
     except Exception as e:
+        print(f"❌ Backup error: {e}")
         raise HTTPException(status_code=500, detail=f"Backup failed: {str(e)}")
+    return backup_response(backup)
+
+@app.get("/api/backups")
+async def list_backups():
+    """Stored backups, newest first, with sizes and checksums"""
+    return await run_db(backup_store.list)
+
+@app.get("/api/backups/{name}")
+async def download_stored_backup(name: str):
+    """Stream a stored backup"""
+    backups = {backup["name"]: backup for backup in await run_db(backup_store.list)}
+    if name not in backups:
+        raise HTTPException(status_code=404, detail="Backup not found")
+    return backup_response(backups[name])
+
+# Audio uploads are capped in size and decoded to mono 16-bit PCM by piping
+# through ffmpeg. At most AUDIO_MAX_WORKERS decodes/recognitions run at once,
+# each decode in its own ffmpeg process, so recordings never block the loop.
+# Duration and sample rate are probed from the container header before any
+# transcoding, and the decode itself stops at AUDIO_MAX_SECONDS, so the PCM
+# held per request never exceeds AUDIO_MAX_SECONDS * 32 KB.
+AUDIO_MAX_BYTES = int(os.getenv("AUDIO_MAX_BYTES", 10 * 1024 * 1024))
+AUDIO_MAX_WORKERS = int(os.getenv("AUDIO_MAX_WORKERS", 2))
+AUDIO_DECODE_TIMEOUT = float(os.getenv("AUDIO_DECODE_TIMEOUT", 30))
+AUDIO_MIN_SECONDS = float(os.getenv("AUDIO_MIN_SECONDS", 0.5))
+AUDIO_MAX_SECONDS = float(os.getenv("AUDIO_MAX_SECONDS", 120))
+AUDIO_MIN_INPUT_RATE = int(os.getenv("AUDIO_MIN_INPUT_RATE", 8000))
+AUDIO_MAX_INPUT_RATE = int(os.getenv("AUDIO_MAX_INPUT_RATE", 192000))
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_SAMPLE_WIDTH = 2
+audio_executor = ThreadPoolExecutor(max_workers=AUDIO_MAX_WORKERS, thread_name_prefix="audio")
+
+class AudioDecodeError(Exception):
+    """Raised when ffmpeg cannot decode an upload"""
+
+class AudioRejected(Exception):
+    """Raised when a recording is outside the configured limits"""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+def parse_wav_header(head: bytes) -> Optional[dict]:
+    """Read duration, sample rate and channels from a RIFF/WAVE header"""
+    if len(head) < 12 or head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+        return None
+    info = {"format": "wav", "duration": None, "sample_rate": None, "channels": None}
+    byte_rate = None
+    offset = 12
+    while offset + 8 <= len(head):
+        chunk_id = head[offset:offset + 4]
+        chunk_size = int.from_bytes(head[offset + 4:offset + 8], "little")
+        if chunk_id == b"fmt " and offset + 24 <= len(head):
+            info["channels"] = int.from_bytes(head[offset + 10:offset + 12], "little")
+            info["sample_rate"] = int.from_bytes(head[offset + 12:offset + 16], "little")
+            byte_rate = int.from_bytes(head[offset + 16:offset + 20], "little")
+        elif chunk_id == b"data":
+            # Streaming writers leave the size at 0 or 0xFFFFFFFF until they finish
+            if byte_rate and 0 < chunk_size < 0xFFFFFFFF:
+                info["duration"] = chunk_size / byte_rate
+            break
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return info
+
+def probe_audio(data: bytes) -> Optional[dict]:
+    """Probe an upload's container for duration and sample rate without decoding it.
+
+    WAV headers are parsed directly; everything else goes through ffprobe.
+    Returns None when the container says nothing useful, in which case the
+    limits are enforced on the (capped) decode instead.
+    """
+    info = parse_wav_header(data[:4096])
+    if info:
+        return info
+    command = ["ffprobe", "-v", "error", "-show_entries", "format=format_name,duration:stream=sample_rate,channels",
+               "-select_streams", "a:0", "-of", "json", "pipe:0"]
+    try:
+        proc = subprocess.run(command, input=data, capture_output=True, timeout=AUDIO_DECODE_TIMEOUT)
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    if proc.returncode != 0:
+        return None
+    try:
+        probed = json.loads(proc.stdout or b"{}")
+    except ValueError:
+        return None
+    fmt = probed.get("format", {})
+    stream = (probed.get("streams") or [{}])[0]
+
+    def number(value, cast):
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            return None
+
+    return {
+        "format": fmt.get("format_name"),
+        "duration": number(fmt.get("duration"), float),
+        "sample_rate": number(stream.get("sample_rate"), int),
+        "channels": number(stream.get("channels"), int),
+    }
+
+def check_audio_limits(info: Optional[dict]):
+    """Reject a recording whose probed duration or sample rate is out of range"""
+    if not info:
+        return
+    duration = info.get("duration")
+    if duration is not None:
+        if duration < AUDIO_MIN_SECONDS:
+            raise AudioRejected("Η ηχογράφηση είναι πολύ σύντομη.")
+        if duration > AUDIO_MAX_SECONDS:
+            raise AudioRejected("Η ηχογράφηση είναι πολύ μεγάλη.", status_code=413)
+    sample_rate = info.get("sample_rate")
+    if sample_rate is not None and not AUDIO_MIN_INPUT_RATE <= sample_rate <= AUDIO_MAX_INPUT_RATE:
+        raise AudioRejected("Μη υποστηριζόμενη συχνότητα δειγματοληψίας.")
+
+def run_ffmpeg(input_args: list, data: Optional[bytes]) -> bytes:
+    """Run ffmpeg with the given input and return raw mono PCM from stdout.
+
+    Output stops just past AUDIO_MAX_SECONDS so an unprobed long recording
+    can be recognized as too long without decoding all of it.
+    """
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", *input_args,
+               "-t", str(AUDIO_MAX_SECONDS + 0.5),
+               "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE), "pipe:1"]
+    try:
+        proc = subprocess.run(command, input=data, capture_output=True, timeout=AUDIO_DECODE_TIMEOUT)
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg is not installed")
+    except subprocess.TimeoutExpired:
+        raise AudioDecodeError(f"ffmpeg timed out after {AUDIO_DECODE_TIMEOUT}s")
+    if proc.returncode != 0:
+        raise AudioDecodeError(proc.stderr.decode(errors="replace").strip()[-300:])
+    return proc.stdout
+
+def decode_to_pcm(data: bytes, file_ext: str) -> bytes:
+    """Decode an uploaded recording to PCM in memory"""
+    try:
+        return run_ffmpeg(["-i", "pipe:0"], data)
+    except AudioDecodeError as pipe_error:
+        if "not installed" in str(pipe_error):
+            raise
+        # Some containers (MP4 with the index at the end, as recorded by iOS)
+        # need a seekable input; only these fall back to a temporary file
+        with tempfile.NamedTemporaryFile(suffix=file_ext) as tmp:
+            tmp.write(data)
+            tmp.flush()
+            return run_ffmpeg(["-i", tmp.name], None)
+
+class SpeechRecognizer:
+    """Interface for speech-to-text backends.
+
+    recognize() returns (text, confidence) for one language, or raises
+    sr.UnknownValueError when nothing was understood.
+    """
+
+    name = "base"
+
+    def recognize(self, audio_data: sr.AudioData, language: str) -> tuple:
+        raise NotImplementedError
+
+class GoogleSpeechRecognizer(SpeechRecognizer):
+    """Google Web Speech API through SpeechRecognition"""
+
+    name = "google"
+
+    def recognize(self, audio_data: sr.AudioData, language: str) -> tuple:
+        result = sr.Recognizer().recognize_google(audio_data, language=language, show_all=True)
+        alternatives = result.get("alternative") if isinstance(result, dict) else None
+        if not alternatives or not alternatives[0].get("transcript"):
+            raise sr.UnknownValueError(f"Nothing recognized for {language}")
+        best = alternatives[0]
+        # Google only sometimes reports a confidence for the top alternative
+        return best["transcript"], float(best.get("confidence", 0.5))
+
+class StubSpeechRecognizer(SpeechRecognizer):
+    """Offline recognizer for tests and benchmarks.
+
+    Answers STUB_SPEECH_TEXT for the languages in STUB_SPEECH_LANGUAGES
+    after STUB_SPEECH_DELAY seconds, and fails for every other language.
+    """
+
+    name = "stub"
+
+    def __init__(self):
+        self.text = os.getenv("STUB_SPEECH_TEXT", "Δοκιμαστική ηχογράφηση")
+        self.languages = os.getenv("STUB_SPEECH_LANGUAGES", "el-GR").split(",")
+        self.delay = float(os.getenv("STUB_SPEECH_DELAY", 0.2))
+
+    def recognize(self, audio_data: sr.AudioData, language: str) -> tuple:
+        time.sleep(self.delay)
+        if language not in self.languages:
+            raise sr.UnknownValueError(f"Nothing recognized for {language}")
+        return self.text, 0.9
+
+SPEECH_RECOGNIZERS = {
+    "google": GoogleSpeechRecognizer,
+    "stub": StubSpeechRecognizer,
+}
+
+# Language candidates, in order of preference, are recognized concurrently.
+# SPEECH_STRATEGY picks the answer: "preferred" (the most preferred language
+# that succeeds - same answer as trying them one by one), "first" (the first
+# success) or "confident" (the highest reported confidence).
+SPEECH_LANGUAGES = [lang.strip() for lang in os.getenv("SPEECH_LANGUAGES", "el-GR,en-US,el").split(",") if lang.strip()]
+SPEECH_STRATEGY = os.getenv("SPEECH_STRATEGY", "preferred")
+speech_recognizer = SPEECH_RECOGNIZERS[os.getenv("SPEECH_RECOGNIZER", "google")]()
+speech_executor = ThreadPoolExecutor(max_workers=int(os.getenv("SPEECH_MAX_WORKERS", 6)), thread_name_prefix="speech")
+
+def recognize_speech(audio_data: sr.AudioData, recognizer: Optional[SpeechRecognizer] = None,
+                     languages: Optional[List[str]] = None, strategy: Optional[str] = None) -> str:
+    """Recognize speech in every candidate language at once and pick one answer"""
+    recognizer = recognizer or speech_recognizer
+    languages = languages or SPEECH_LANGUAGES
+    strategy = strategy or SPEECH_STRATEGY
+    
+    futures = {speech_executor.submit(recognizer.recognize, audio_data, lang): lang for lang in languages}
+    results = {}
+    failure = None
+    for future in as_completed(futures):
+        language = futures[future]
+        try:
+            results[language] = future.result()
+        except sr.UnknownValueError:
+            results[language] = None
+        except Exception as e:
+            print(f"⚠️ Speech recognition ({recognizer.name}, {language}) failed: {e}")
+            results[language] = None
+            failure = e
+        
+        answer = results[language]
+        if strategy == "first" and answer:
+            return answer[0]
+        if strategy == "preferred":
+            # Answer as soon as every more preferred language has come back empty
+            for lang in languages:
+                if lang not in results:
+                    break
+                if results[lang]:
+                    return results[lang][0]
+    
+    answers = [(answer[1], -languages.index(lang), answer[0]) for lang, answer in results.items() if answer]
+    if not answers:
+        # An unreachable backend is a server error, not unintelligible speech
+        if failure is not None:
+            raise failure
+        raise sr.UnknownValueError("Could not understand audio")
+    return max(answers)[2]
+
+def decode_and_check(data: bytes, file_ext: str) -> bytes:
+    """Probe an upload against the audio limits, then decode it to PCM"""
+    check_audio_limits(probe_audio(data))
+    pcm = decode_to_pcm(data, file_ext)
+    duration = len(pcm) / (AUDIO_SAMPLE_RATE * AUDIO_SAMPLE_WIDTH)
+    if duration < AUDIO_MIN_SECONDS:
+        raise AudioRejected("Η ηχογράφηση είναι πολύ σύντομη.")
+    if duration > AUDIO_MAX_SECONDS:
+        raise AudioRejected("Η ηχογράφηση είναι πολύ μεγάλη.", status_code=413)
+    return pcm
+
+async def read_upload(upload: UploadFile, max_bytes: int) -> bytes:
+    """Read an upload in chunks, rejecting it as soon as it exceeds max_bytes.
+
+    A WAV header that already declares an out-of-range recording is
+    rejected after the first chunk, before the rest is buffered.
+    """
+    buffer = bytearray()
+    while True:
+        chunk = await upload.read(64 * 1024)
+        if not chunk:
+            return bytes(buffer)
+        if not buffer:
+            check_audio_limits(parse_wav_header(chunk[:4096]))
+        buffer += chunk
+        if len(buffer) > max_bytes:
+            raise HTTPException(status_code=413, detail="Το αρχείο ήχου είναι πολύ μεγάλο.")
 
 @app.post("/api/transcribe")
 async def transcribe_audio(audio: UploadFile = File(None), file: UploadFile = File(None)):
     """Transcribe audio to text using speech recognition"""
-    tmp_original = None
-    tmp_wav = None
+    # Pick whichever field name the client used (audio or file)
+    upload = audio or file
+    if upload is None:
+        raise HTTPException(status_code=400, detail="Δεν βρέθηκε αρχείο ήχου (πεδίο 'audio').")
     
     try:
-        # Pick whichever field name the client used (audio or file)
-        upload = audio or file
-        if upload is None:
-            raise HTTPException(status_code=400, detail="Δεν βρέθηκε αρχείο ήχου (πεδίο 'audio').")
-
-        # Save uploaded file
-        file_ext = os.path.splitext(upload.filename)[1].lower() or '.webm'
-        tmp_original = tempfile.NamedTemporaryFile(delete=False, suffix=file_ext)
-        tmp_original.write(await upload.read())
-        tmp_original.close()
-        
-        # Convert to WAV if needed
-        tmp_wav = tempfile.NamedTemporaryFile(delete=False, suffix='.wav').name
-        audio_segment = AudioSegment.from_file(tmp_original.name)
+        file_ext = os.path.splitext(upload.filename or '')[1].lower() or '.webm'
+        data = await read_upload(upload, AUDIO_MAX_BYTES)
         
-        if file_ext != '.wav':
-            audio_segment.export(tmp_wav, format="wav")
-        else:
-            tmp_wav = tmp_original.name
-        
-        # Check duration
-        with sr.AudioFile(tmp_wav) as source:
-            if source.DURATION < 0.5:
-                raise HTTPException(status_code=400, detail="Η ηχογράφηση είναι πολύ σύντομη.")
+        loop = asyncio.get_running_loop()
+        pcm = await loop.run_in_executor(audio_executor, decode_and_check, data, file_ext)
+        del data
         
-        # Configure recognizer
-        recognizer = sr.Recognizer()
-        recognizer.energy_threshold = 300
-        recognizer.dynamic_energy_threshold = True
-        recognizer.pause_threshold = 0.8
-        
-        # Transcribe
-        with sr.AudioFile(tmp_wav) as source:
-            recognizer.adjust_for_ambient_noise(source, duration=min(1.0, source.DURATION / 2))
-            audio_data = recognizer.record(source)
-        
-        text = None
-        try:
-            text = recognizer.recognize_google(audio_data, language='el-GR', show_all=False)
-        except sr.UnknownValueError:
-            try:
-                text = recognizer.recognize_google(audio_data, language='en-US', show_all=False)
-            except sr.UnknownValueError:
-                try:
-                    text = recognizer.recognize_google(audio_data, language='el', show_all=False)
-                except sr.UnknownValueError:
-                    raise sr.UnknownValueError("Could not understand audio")
-        
-        # Cleanup
-        if tmp_original and os.path.exists(tmp_original.name):
-            os.unlink(tmp_original.name)
-        if tmp_wav and os.path.exists(tmp_wav) and tmp_wav != tmp_original.name:
-            os.unlink(tmp_wav)
+        audio_data = sr.AudioData(pcm, AUDIO_SAMPLE_RATE, AUDIO_SAMPLE_WIDTH)
+        text = await loop.run_in_executor(audio_executor, recognize_speech, audio_data)
         
         if not text:
             raise sr.UnknownValueError("No text recognized")
         
         return {"text": text}
         
+    except HTTPException:
+        raise
+    except AudioRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except sr.UnknownValueError:
-        if tmp_original and os.path.exists(tmp_original.name):
-            os.unlink(tmp_original.name)
-        if tmp_wav and os.path.exists(tmp_wav):
-            os.unlink(tmp_wav)
         raise HTTPException(status_code=400, detail="Δεν κατάλαβα τι είπατε.")
     except Exception as e:
-        if tmp_original and os.path.exists(tmp_original.name):
-            os.unlink(tmp_original.name)
-        if tmp_wav and os.path.exists(tmp_wav):
-            os.unlink(tmp_wav)
         print(f"❌ Transcription error: {e}")
         raise HTTPException(status_code=500, detail="Σφάλμα μεταγραφής.")
 
 @app.post("/api/submit")
-async def submit_story(submission: StorySubmission):
+async def submit_story(submission: StorySubmission, request: Request):
     if not submission.text or len(submission.text.strip()) < 10:
         raise HTTPException(status_code=400, detail="Το κείμενο είναι πολύ σύντομο (τουλάχιστον 10 χαρακτήρες)")
     
+    deadline = LLMDeadline(LLM_DEADLINE_SUBMIT)
+    
     # Use enhanced transformer with user preference
     try:
-        result = transformer.generate_enhanced(submission.text, submission.transformation_style)
+        result = await run_llm_with_deadline(deadline, request, transformer.generate_enhanced,
+                                             submission.text, submission.transformation_style)
         transformed = result["transformed_text"]
         llm_comment = result.get("llm_comment", "")
         quality_score = result["quality_score"]
@@ -900,39 +2842,25 @@ async def submit_story(submission: StorySubmission):
                 "transformed_text": transformed,
                 "status": "rejected",
                 "author_name": submission.author_name or None,
-                "transformation_style": style_used
+                "transformation_style": style_used,
+                "llm_budget": deadline.report()
             }
         
+    except LLMDeadlineExceeded as e:
+        print(f"⏱️ Transformation gave up ({e}): {deadline.report()}")
+        raise HTTPException(status_code=504, detail="Ο μετασχηματισμός άργησε πολύ. Παρακαλώ δοκιμάστε ξανά.")
     except Exception as e:
         print(f"❌ Enhanced transformation failed: {e}")
         raise HTTPException(status_code=500, detail="Σφάλμα μετασχηματισμού. Παρακαλώ δοκιμάστε ξανά.")
     
     # Save to database
     try:
-        conn = get_db()
-        
         # Get emoji theme
         emoji_theme = transformer.get_emoji_theme(submission.text)
-        emoji_data_json = json.dumps(emoji_theme)
         
-        cursor = execute_query(
-            conn,
-            "INSERT INTO stories (original_text, transformed_text, llm_comment, author_name, status, emoji_theme, emoji_data) VALUES (?, ?, ?, ?, 'pending', ?, ?) RETURNING id" if is_postgres() else "INSERT INTO stories (original_text, transformed_text, llm_comment, author_name, status, emoji_theme, emoji_data) VALUES (?, ?, ?, ?, 'pending', ?, ?)",
-            (submission.text, transformed, llm_comment, submission.author_name, emoji_theme['theme'], emoji_data_json)
-        )
-        if is_postgres():
-            story_id = cursor.fetchone()['id']
-            conn.commit()
-            cursor.close()
-        else:
-            story_id = cursor.lastrowid
-            conn.commit()
-        
-        cursor = execute_query(conn, "SELECT * FROM stories WHERE id = ?", (story_id,))
-        story = fetchone_dict(conn, cursor)
-        if is_postgres():
-            cursor.close()
-        conn.close()
+        story = await run_db(insert_story, submission.text, transformed, llm_comment,
+                             submission.author_name, emoji_theme)
+        story_id = story["id"]
         
         # Notify moderators
         await manager.notify_moderators({
@@ -946,6 +2874,7 @@ async def submit_story(submission: StorySubmission):
                 "created_at": story["created_at"]
             }
         })
+        await event_bus.publish("counters", json.dumps({"insert": "pending"}))
         
         return {
             "success": True,
@@ -954,81 +2883,104 @@ async def submit_story(submission: StorySubmission):
             "status": "pending_moderation",
             "emoji_theme": emoji_theme,
             "author_name": story["author_name"],
-            "transformation_style": style_used
+            "transformation_style": style_used,
+            "llm_budget": deadline.report()
         }
     except Exception as e:
         print(f"❌ Database error: {e}")
         raise HTTPException(status_code=500, detail="Σφάλμα αποθήκευσης. Παρακαλώ δοκιμάστε ξανά.")
 
-@app.get("/api/stories")
-async def get_stories(limit: int = 50):
-    conn = get_db()
-    cursor = execute_query(
-        conn,
-        "SELECT id, transformed_text, llm_comment, author_name, created_at, emoji_theme, emoji_data FROM stories WHERE status = 'approved' ORDER BY created_at DESC LIMIT ?",
-        (limit,)
-    )
-    stories = fetchall_dict(conn, cursor)
-    if is_postgres():
-        cursor.close()
-    conn.close()
-    
-    # Parse emoji data for each story
-    result = []
+# Story listings are paged by keyset on (created_at, id): each page ends
+# with an opaque next_cursor and the next request continues strictly after
+# it, so a page costs the same index range scan however large the table is.
+STORIES_PAGE_MAX = int(os.getenv("STORIES_PAGE_MAX", 200))
+
+def encode_cursor(story: dict) -> str:
+    created_at = story["created_at"]
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps([created_at, story["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        created_at, story_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(created_at, str) or not isinstance(story_id, int):
+            raise ValueError(cursor)
+        return created_at, story_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_emoji_data(stories: List[dict]) -> List[dict]:
     for story in stories:
         if story.get('emoji_data'):
             try:
                 story['emoji_theme_data'] = json.loads(story['emoji_data'])
             except:
                 story['emoji_theme_data'] = None
-        result.append(story)
-    
-    return result
+    return stories
+
+async def fetch_story_page(columns: str, status: Optional[str], limit: int,
+                           cursor: Optional[str], descending: bool) -> dict:
+    """Fetch one keyset page of stories, newest or oldest first"""
+    limit = max(1, min(limit, STORIES_PAGE_MAX))
+    conditions, params = [], []
+    if status:
+        conditions.append("status = ?")
+        params.append(status)
+    if cursor:
+        conditions.append(f"(created_at, id) {'<' if descending else '>'} (?, ?)")
+        params.extend(decode_cursor(cursor))
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+    direction = "DESC" if descending else "ASC"
+    stories = await fetchall_async(
+        f"SELECT {columns} FROM stories {where}ORDER BY created_at {direction}, id {direction} LIMIT ?",
+        (*params, limit + 1)
+    )
+    next_cursor = encode_cursor(stories[limit - 1]) if len(stories) > limit else None
+    return {"stories": stories[:limit], "next_cursor": next_cursor}
+
+async def approved_stories_page(limit: int, cursor: Optional[str] = None) -> dict:
+    page = await fetch_story_page(
+        "id, transformed_text, llm_comment, author_name, created_at, emoji_theme, emoji_data",
+        "approved", limit, cursor, descending=True
+    )
+    parse_emoji_data(page["stories"])
+    return page
+
+@app.get("/api/stories")
+async def get_stories(request: Request, response: Response, limit: int = 50, cursor: Optional[str] = None):
+    if not_modified := check_data_version(request, response):
+        return not_modified
+    return await approved_stories_page(limit, cursor)
 
 @app.get("/api/stories/pending")
-async def get_pending_stories():
-    conn = get_db()
-    cursor = execute_query(
-        conn,
-        "SELECT id, original_text, transformed_text, llm_comment, author_name, created_at FROM stories WHERE status = 'pending' ORDER BY created_at ASC"
+async def get_pending_stories(request: Request, response: Response, limit: int = 50,
+                              cursor: Optional[str] = None, order: str = "asc"):
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid order")
+    if not_modified := check_data_version(request, response):
+        return not_modified
+    return await fetch_story_page(
+        "id, original_text, transformed_text, llm_comment, author_name, created_at",
+        "pending", limit, cursor, descending=order == "desc"
     )
-    stories = fetchall_dict(conn, cursor)
-    if is_postgres():
-        cursor.close()
-    conn.close()
-    return stories
 
 @app.post("/api/moderate")
 async def moderate_story(action: ModerationAction):
     if action.action not in ['approve', 'reject']:
         raise HTTPException(status_code=400, detail="Invalid action")
     
-    conn = get_db()
-    cursor = execute_query(conn, "SELECT * FROM stories WHERE id = ?", (action.story_id,))
-    story = fetchone_dict(conn, cursor)
-    if is_postgres():
-        cursor.close()
-    
-    if not story:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Story not found")
-    
     new_status = 'approved' if action.action == 'approve' else 'rejected'
     
-    cursor = execute_query(
-        conn,
-        "UPDATE stories SET status = ?, moderated_at = CURRENT_TIMESTAMP, moderated_by = ? WHERE id = ?",
-        (new_status, action.moderator_name, action.story_id)
-    )
-    conn.commit()
-    if is_postgres():
-        cursor.close()
-    
-    cursor = execute_query(conn, "SELECT * FROM stories WHERE id = ?", (action.story_id,))
-    updated_story = fetchone_dict(conn, cursor)
-    if is_postgres():
-        cursor.close()
-    conn.close()
+    moderated = await run_db(apply_moderation, action.story_id, new_status, action.moderator_name)
+    if not moderated:
+        raise HTTPException(status_code=404, detail="Story not found")
+    previous_status, updated_story = moderated
+    if new_status == 'approved':
+        await event_bus.publish("recent", encode_message({"add": updated_story}))
+    elif previous_status == 'approved':
+        await event_bus.publish("recent", json.dumps({"discard": updated_story["id"]}))
     
     if action.action == 'approve':
         # Get emoji data for the story
@@ -1050,87 +3002,284 @@ async def moderate_story(action: ModerationAction):
                 "emoji_theme_data": emoji_data
             }
         })
+    await event_bus.publish("counters", json.dumps({"transition": [previous_status, new_status]}))
     
     return {"success": True, "action": action.action}
 
 @app.get("/api/stats")
-async def get_stats():
-    conn = get_db()
-    cursor = execute_query(conn, "SELECT COUNT(*) as count FROM stories")
-    total = fetchone_dict(conn, cursor)['count']
-    if is_postgres():
-        cursor.close()
-    
-    cursor = execute_query(conn, "SELECT COUNT(*) as count FROM stories WHERE status = 'approved'")
-    approved = fetchone_dict(conn, cursor)['count']
-    if is_postgres():
-        cursor.close()
-    
-    cursor = execute_query(conn, "SELECT COUNT(*) as count FROM stories WHERE status = 'pending'")
-    pending = fetchone_dict(conn, cursor)['count']
-    if is_postgres():
-        cursor.close()
-    
-    cursor = execute_query(conn, "SELECT COUNT(*) as count FROM stories WHERE status = 'rejected'")
-    rejected = fetchone_dict(conn, cursor)['count']
-    if is_postgres():
-        cursor.close()
-    conn.close()
-    
-    return {
-        "total_submissions": total,
-        "approved": approved,
-        "pending": pending,
-        "rejected": rejected
-    }
+async def get_stats(request: Request, response: Response):
+    if not_modified := check_data_version(request, response):
+        return not_modified
+    return story_counters.snapshot()
 
 @app.get("/api/stories/all")
-async def get_all_stories():
-    """Recovery endpoint: Get ALL stories regardless of status"""
-    conn = get_db()
-    cursor = execute_query(
-        conn,
-        "SELECT id, original_text, transformed_text, llm_comment, author_name, status, created_at, moderated_at, moderated_by, emoji_theme, emoji_data FROM stories ORDER BY created_at DESC"
+async def get_all_stories(limit: int = 100, cursor: Optional[str] = None):
+    """Recovery endpoint: page through ALL stories regardless of status"""
+    page = await fetch_story_page(
+        "id, original_text, transformed_text, llm_comment, author_name, status, created_at, moderated_at, moderated_by, emoji_theme, emoji_data",
+        None, limit, cursor, descending=True
     )
-    stories = fetchall_dict(conn, cursor)
-    if is_postgres():
-        cursor.close()
-    conn.close()
-    
-    result = []
-    for story in stories:
-        if story.get('emoji_data'):
-            try:
-                story['emoji_theme_data'] = json.loads(story['emoji_data'])
-            except:
-                story['emoji_theme_data'] = None
-        result.append(story)
-    
-    return result
+    parse_emoji_data(page["stories"])
+    return page
+
+# Exports stream from a cursor in EXPORT_BATCH_SIZE batches, so memory stays
+# flat however many stories there are
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 500))
+
+async def stream_export(query: str, params: tuple, fmt: str, compress: bool):
+    """Yield an export as a JSON document or NDJSON lines, optionally gzipped"""
+    conn, cursor = await run_db(open_stream_cursor, query, params)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def output(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    try:
+        if fmt == "json":
+            yield output(f'{{"export_date":"{datetime.now().isoformat()}","stories":[')
+        total = 0
+        while True:
+            rows = await run_db(fetch_batch, cursor, EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            parts = []
+            for story in parse_emoji_data(rows):
+                line = encode_message(story)
+                parts.append(line + "\n" if fmt == "ndjson" else ("," if total else "") + line)
+                total += 1
+            chunk = output("".join(parts))
+            if chunk:
+                yield chunk
+        if fmt == "json":
+            yield output(f'],"total_stories":{total}}}')
+        if compressor:
+            yield compressor.flush()
+    finally:
+        await run_db(close_stream_cursor, conn, cursor)
+
+def db_timestamp(moment: datetime):
+    """A datetime as a stories timestamp parameter.
+
+    Stored timestamps are UTC without a zone (CURRENT_TIMESTAMP); SQLite
+    keeps them as 'YYYY-MM-DD HH:MM:SS' text, so comparisons need that exact
+    form. Aware datetimes are converted to UTC, naive ones are taken as UTC.
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment if is_postgres() else moment.strftime("%Y-%m-%d %H:%M:%S")
 
 @app.get("/api/stories/export")
-async def export_stories():
-    """Export all stories as JSON for backup"""
-    conn = get_db()
-    cursor = execute_query(conn, "SELECT * FROM stories ORDER BY created_at DESC")
-    stories = fetchall_dict(conn, cursor)
+async def export_stories(format: str = "json", compress: bool = False,
+                         since_id: Optional[int] = None, since: Optional[str] = None):
+    """Stream all stories for backup.
+
+    format=json keeps the single-document shape, format=ndjson writes one
+    story per line; compress=true gzips on the fly. since_id and since
+    (stories created or moderated after a timestamp) make incremental pulls.
+    """
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="Invalid format")
+    conditions, params = [], []
+    if since_id is not None:
+        conditions.append("id > ?")
+        params.append(since_id)
+    if since:
+        # Validate up front: once streaming starts the status is already 200
+        try:
+            since_time = datetime.fromisoformat(since)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid since timestamp")
+        conditions.append("(created_at > ? OR moderated_at > ?)")
+        params.extend([db_timestamp(since_time)] * 2)
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+    query = f"SELECT * FROM stories {where}ORDER BY id"
+    
+    extension = "ndjson" if format == "ndjson" else "json"
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    if compress:
+        extension += ".gz"
+        media_type = "application/gzip"
+    filename = f"stories_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    return StreamingResponse(
+        stream_export(query, tuple(params), format, compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Imports read an export (JSON document or NDJSON, optionally gzipped) as a
+# stream and insert IMPORT_BATCH_SIZE rows per transaction: executemany with
+# INSERT OR IGNORE on SQLite, COPY into a temp table and INSERT ... ON
+# CONFLICT DO NOTHING on Postgres. Ids and timestamps are preserved and rows
+# whose id already exists are skipped.
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 5000))
+IMPORT_COLUMNS = BACKUP_TABLES["stories"]
+STORIES_ARRAY = re.compile(r'"stories"\s*:\s*\[')
+
+def iter_export_stories(stream):
+    """Yield story dicts from a binary export stream in either format"""
+    if hasattr(stream, "peek"):
+        head = stream.peek(2)[:2]
+    else:
+        head = stream.read(2)
+        stream.seek(0)
+    if head == b"\x1f\x8b":
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+    text = io.TextIOWrapper(stream, encoding="utf-8")
+    decoder = json.JSONDecoder()
+    buffer = text.read(64 * 1024)
+    first_line = buffer.split("\n", 1)[0].strip()
+    try:
+        first = json.loads(first_line) if first_line else None
+    except ValueError:
+        first = None
+    if isinstance(first, dict) and "stories" not in first:
+        # NDJSON: one story per line
+        pending = ""
+        while buffer:
+            lines = (pending + buffer).split("\n")
+            pending = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+            buffer = text.read(64 * 1024)
+        if pending.strip():
+            yield json.loads(pending)
+        return
+    # JSON document: decode the "stories" array one object at a time
+    while not (match := STORIES_ARRAY.search(buffer)):
+        more = text.read(64 * 1024)
+        if not more:
+            raise ValueError("No stories array in export")
+        buffer += more
+    position = match.end()
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            story, position = decoder.raw_decode(buffer, position)
+        except ValueError:
+            more = text.read(64 * 1024)
+            if not more:
+                raise
+            buffer = buffer[position:] + more
+            position = 0
+            continue
+        yield story
+        if position > 64 * 1024:
+            buffer, position = buffer[position:], 0
+
+def import_row(story: dict) -> Optional[tuple]:
+    """Map an exported story onto IMPORT_COLUMNS, or None if it can't be restored"""
+    if not isinstance(story, dict) or not isinstance(story.get("id"), int) or not story.get("original_text"):
+        return None
+    row = dict(story)
+    if row.get("emoji_data") is None and row.get("emoji_theme_data") is not None:
+        row["emoji_data"] = json.dumps(row["emoji_theme_data"])
+    if not row.get("created_at"):
+        # Same UTC text form as CURRENT_TIMESTAMP, so keyset order holds
+        row["created_at"] = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    # Without a status the story goes through moderation like a new submission
+    row["status"] = row.get("status") or "pending"
+    return tuple(row.get(column) for column in IMPORT_COLUMNS)
+
+def insert_import_batch(conn, rows: List[tuple]) -> int:
+    """Insert one batch in a single transaction and return how many rows were new"""
+    columns = ", ".join(IMPORT_COLUMNS)
     if is_postgres():
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            ["\\N" if value is None else value for value in row] for row in rows
+        )
+        buffer.seek(0)
+        cursor = conn.cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS story_import (LIKE stories) ON COMMIT DELETE ROWS")
+        cursor.copy_expert(f"COPY story_import ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+        cursor.execute(f"INSERT INTO stories ({columns}) SELECT {columns} FROM story_import ON CONFLICT (id) DO NOTHING")
+        inserted = cursor.rowcount
         cursor.close()
-    conn.close()
-    
-    result = []
-    for story in stories:
-        if story.get('emoji_data'):
-            try:
-                story['emoji_theme_data'] = json.loads(story['emoji_data'])
-            except:
-                pass
-        result.append(story)
-    
+    else:
+        before = conn.total_changes
+        conn.executemany(
+            f"INSERT OR IGNORE INTO stories ({columns}) VALUES ({', '.join('?' * len(IMPORT_COLUMNS))})", rows
+        )
+        inserted = conn.total_changes - before
+    conn.commit()
+    return inserted
+
+def import_stories(stream) -> dict:
+    """Restore stories from an export stream and report throughput"""
+    started = time.perf_counter()
+    report = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0}
+    conn = get_db()
+    try:
+        batch = []
+        for story in iter_export_stories(stream):
+            report["read"] += 1
+            row = import_row(story)
+            if row is None:
+                report["invalid"] += 1
+                continue
+            batch.append(row)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                report["inserted"] += insert_import_batch(conn, batch)
+                batch = []
+        if batch:
+            report["inserted"] += insert_import_batch(conn, batch)
+        if is_postgres():
+            # Keep new submissions from colliding with restored ids
+            run_statement(conn, "SELECT setval('stories_id_seq', GREATEST((SELECT MAX(id) FROM stories), 1))")
+            conn.commit()
+    finally:
+        conn.close()
+    report["duplicates"] = report["read"] - report["invalid"] - report["inserted"]
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["rows_per_second"] = round(report["read"] / report["seconds"]) if report["seconds"] else None
+    return report
+
+@app.post("/api/stories/import")
+async def import_story_archive(file: UploadFile = File(...)):
+    """Restore stories from an /api/stories/export file (JSON or NDJSON, gzip ok)"""
+    try:
+        report = await run_db(import_stories, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid export file: {e}")
+    # Counters and LLM context are derived from the table; reload them everywhere
+    await event_bus.publish("resync", "")
+    print(f"📥 Imported stories: {report}")
+    return report
+
+@app.get("/api/db/pool")
+async def get_db_pool_stats():
+    """Connection pool metrics"""
+    return db_pool.snapshot()
+
+@app.get("/api/ws/connections")
+async def get_ws_connection_stats():
+    """WebSocket client, send-queue and event bus metrics"""
+    return {**manager.snapshot(), "event_bus": event_bus.snapshot(), "display_log": display_log.snapshot()}
+
+@app.get("/api/models/routing")
+async def get_model_routing():
+    """Per-model health, circuit state, recent routing decisions and hedging metrics"""
+    return {**model_router.snapshot(), "hedging": hedge_policy.snapshot()}
+
+@app.get("/api/transformation-cache")
+async def get_transformation_cache_stats():
+    """Hit/miss counters for the transformation result cache"""
+    return transformation_cache.snapshot()
+
+@app.get("/api/quality/rescore")
+async def rescore_stories():
+    """Re-score every stored transformation with the current quality thresholds"""
+    stories = await fetchall_async("SELECT id, original_text, transformed_text FROM stories ORDER BY id")
+    scores = quality_scorer.score_batch((s["original_text"], s["transformed_text"]) for s in stories)
     return {
-        "export_date": datetime.now().isoformat(),
-        "total_stories": len(result),
-        "stories": result
+        "total_stories": len(stories),
+        "average_score": round(sum(scores) / len(scores), 3) if scores else 0.0,
+        "scores": [{"id": s["id"], "quality_score": score} for s, score in zip(stories, scores)]
     }
 
 @app.get("/api/transformation-styles")
@@ -1162,13 +3311,16 @@ async def get_transformation_styles():
     }
 
 @app.post("/api/preview-transformation")
-async def preview_transformation(submission: StorySubmission):
+async def preview_transformation(submission: StorySubmission, request: Request):
     """Preview transformation without saving"""
     if not submission.text or len(submission.text.strip()) < 10:
         raise HTTPException(status_code=400, detail="Το κείμενο είναι πολύ σύντομο")
     
+    deadline = LLMDeadline(LLM_DEADLINE_PREVIEW)
     try:
-        result = transformer.generate_enhanced(submission.text, submission.transformation_style)
+        result = await run_llm_with_deadline(deadline, request, transformer.generate_enhanced,
+                                             submission.text, submission.transformation_style,
+                                             hedge=LLM_HEDGE_PREVIEW)
         return {
             "transformed_text": result["transformed_text"],
             "llm_comment": result.get("llm_comment", ""),
@@ -1177,22 +3329,58 @@ async def preview_transformation(submission: StorySubmission):
             "analysis": result["analysis"],
             "success": result["success"]
         }
+    except LLMDeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"Transformation timed out: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Transformation failed: {str(e)}")
 
+async def receive_resume(websocket: WebSocket) -> Optional[dict]:
+    """Wait briefly for a display's resume message; older clients never send one"""
+    try:
+        message = json.loads(await asyncio.wait_for(websocket.receive_text(), DISPLAY_RESUME_WAIT))
+    except (asyncio.TimeoutError, json.JSONDecodeError):
+        return None
+    if isinstance(message, dict) and message.get("type") == "resume":
+        return message
+    return None
+
 @app.websocket("/ws/display")
 async def websocket_display(websocket: WebSocket):
-    await manager.connect(websocket, is_moderator=False)
+    await websocket.accept()
     try:
+        resume = await receive_resume(websocket)
+        reset = None
+        missed = []
+        if resume is not None:
+            missed = display_log.since(resume.get("epoch"), resume.get("last_seq"))
+            if missed is None:
+                # Anything broadcast while the stories load is replayed after the reset
+                reset_seq = display_log.seq
+                reset = {"type": "reset", "epoch": display_log.epoch, "seq": reset_seq,
+                         "stories": (await approved_stories_page(DISPLAY_RESET_STORIES))["stories"]}
+                missed = display_log.since(display_log.epoch, reset_seq) or []
+                display_log.resets += 1
+            elif missed:
+                display_log.replays += 1
+        # No awaits between reading the log and registering, so nothing is missed twice or skipped
+        manager.register(websocket, is_moderator=False)
+        manager.send(websocket, {"type": "stats", "data": story_counters.snapshot()})
+        if reset:
+            manager.send(websocket, reset)
+        for frame in missed:
+            manager.send_frame(websocket, frame)
         while True:
             await websocket.receive_text()
-    except WebSocketDisconnect:
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
         manager.disconnect(websocket, is_moderator=False)
 
 @app.websocket("/ws/moderate")
 async def websocket_moderate(websocket: WebSocket):
     await manager.connect(websocket, is_moderator=True)
     try:
+        manager.send(websocket, {"type": "stats", "data": story_counters.snapshot()})
         while True:
             data = await websocket.receive_text()
             try:
@@ -1207,7 +3395,9 @@ async def websocket_moderate(websocket: WebSocket):
             except json.JSONDecodeError:
                 # Handle ping messages
                 pass
-    except WebSocketDisconnect:
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
         manager.disconnect(websocket, is_moderator=True)
 
 @app.get("/")
@@ -0,0 +1,29 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    """Run against an empty, migrated stories.db in a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    main.db_pool.close_all()
+    main.init_db()
+    main.story_counters.seed(main.count_stories_by_status())
+    main.recent_stories.load()
+    asyncio.run(main.event_bus.start(main.dispatch_event))
+    yield tmp_path
+    main.db_pool.close_all()
+
+
+def make_request(headers: dict = None):
+    """A bare GET request for calling handlers directly"""
+    from starlette.requests import Request
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
@@ -0,0 +1,91 @@
+import asyncio
+import io
+import struct
+import tracemalloc
+import wave
+
+import pytest
+from starlette.datastructures import UploadFile
+
+import main
+
+
+def wav_bytes(seconds: float, rate: int = 16000, channels: int = 1) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\0\0" * channels * int(seconds * rate))
+    return buffer.getvalue()
+
+
+def test_parse_wav_header_reads_duration_and_format():
+    info = main.parse_wav_header(wav_bytes(1.5, rate=44100, channels=2)[:4096])
+    assert info == {"format": "wav", "duration": 1.5, "sample_rate": 44100, "channels": 2}
+
+
+def test_parse_wav_header_skips_extra_chunks():
+    data = wav_bytes(2)
+    # Insert an odd-sized LIST chunk (padded to even) between fmt and data
+    extra = b"LIST" + struct.pack("<I", 5) + b"abcde\0"
+    fmt_end = 12 + 8 + 16
+    patched = data[:fmt_end] + extra + data[fmt_end:]
+    assert main.parse_wav_header(patched[:4096])["duration"] == 2.0
+
+
+@pytest.mark.parametrize("size", [0, 0xFFFFFFFF])
+def test_parse_wav_header_streaming_size_is_unknown(size):
+    data = bytearray(wav_bytes(1))
+    data[40:44] = struct.pack("<I", size)
+    info = main.parse_wav_header(bytes(data[:4096]))
+    assert info["duration"] is None
+    assert info["sample_rate"] == 16000
+
+
+@pytest.mark.parametrize("head", [b"", b"RIFF", b"\x1aE\xdf\xa3webm", b"OggS" + b"\0" * 40])
+def test_parse_wav_header_ignores_other_containers(head):
+    assert main.parse_wav_header(head) is None
+
+
+@pytest.mark.parametrize("seconds, rate, status", [(0.2, 16000, 400), (1, 4000, 400)])
+def test_check_audio_limits(seconds, rate, status):
+    with pytest.raises(main.AudioRejected) as rejected:
+        main.check_audio_limits(main.parse_wav_header(wav_bytes(seconds, rate)))
+    assert rejected.value.status_code == status
+
+
+def test_long_wav_rejected_from_header_with_bounded_memory():
+    data = wav_bytes(main.AUDIO_MAX_SECONDS * 2)
+    assert len(data) < main.AUDIO_MAX_BYTES
+    upload = UploadFile(io.BytesIO(data), filename="long.wav")
+    # Warm up the threadpool UploadFile.read() uses so its imports aren't measured
+    asyncio.run(main.read_upload(UploadFile(io.BytesIO(wav_bytes(1)), filename="short.wav"), main.AUDIO_MAX_BYTES))
+
+    tracemalloc.start()
+    with pytest.raises(main.AudioRejected) as rejected:
+        asyncio.run(main.read_upload(upload, main.AUDIO_MAX_BYTES))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert rejected.value.status_code == 413
+    # Only the first chunk was buffered, not the multi-megabyte upload
+    assert peak < 1024 * 1024, peak
+
+
+def test_decode_and_check_rejects_before_decoding(monkeypatch):
+    def no_decode(*args):
+        raise AssertionError("decoded an out-of-range recording")
+
+    monkeypatch.setattr(main, "decode_to_pcm", no_decode)
+    data = wav_bytes(main.AUDIO_MAX_SECONDS + 5)
+
+    tracemalloc.start()
+    with pytest.raises(main.AudioRejected):
+        main.decode_and_check(data, ".wav")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert peak < 1024 * 1024, peak
+    with pytest.raises(main.AudioRejected):
+        main.decode_and_check(wav_bytes(0.1), ".wav")
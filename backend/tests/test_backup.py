@@ -0,0 +1,50 @@
+import gzip
+
+import main
+
+
+class FakeCursor:
+    def __init__(self, statements):
+        self.statements = statements
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+    def copy_expert(self, sql, out):
+        self.statements.append(sql)
+        out.write("1\tαρχικό\tνέο\t\\N\tΜαρία\tapproved\t2026-03-01 10:00:00\t\\N\t\\N\tlove\t{}\n")
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self.statements)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def test_postgres_dump_names_its_columns(tmp_path, monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(main, "get_db", lambda: conn)
+    path = tmp_path / "dump.sql.gz"
+
+    main.BackupStore(tmp_path, keep=1)._dump_postgres(path)
+
+    columns = "(id, original_text, transformed_text, llm_comment, author_name, status, " \
+              "created_at, moderated_at, moderated_by, emoji_theme, emoji_data)"
+    assert f"COPY stories {columns} TO STDOUT" in conn.statements
+    with gzip.open(path, "rt", encoding="utf-8") as dump:
+        lines = dump.read().splitlines()
+    assert f"COPY stories {columns} FROM stdin;" in lines
+    assert lines[lines.index(f"COPY stories {columns} FROM stdin;") + 2] == "\\."
+    assert conn.closed
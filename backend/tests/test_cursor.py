@@ -0,0 +1,32 @@
+import base64
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import main
+
+
+def b64(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    cursor = main.encode_cursor({"created_at": "2026-03-01 10:00:00", "id": 42})
+    assert main.decode_cursor(cursor) == ("2026-03-01 10:00:00", 42)
+
+
+@pytest.mark.parametrize("cursor", [
+    "NQ",            # decodes to 5, which can't be unpacked
+    "bnVsbA",        # null
+    b64([1, 2, 3]),
+    b64({"a": 1}),
+    b64([5, "2026-03-01"]),
+    "not base64!",
+    "ΑΒΓ",
+    "",
+])
+def test_malformed_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as rejected:
+        main.decode_cursor(cursor)
+    assert rejected.value.status_code == 400
@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+import pytest
+from starlette.responses import Response
+
+import main
+from conftest import make_request
+
+# Stands in for the round trip to a database server, during which a worker
+# thread waits without holding the GIL
+QUERY_LATENCY = 0.02
+
+
+@pytest.fixture
+def stories(fresh_db):
+    conn = main.get_db()
+    try:
+        conn.executemany(
+            "INSERT INTO stories (original_text, transformed_text, llm_comment, author_name, status, emoji_theme, emoji_data) "
+            "VALUES (?, ?, ?, ?, 'approved', 'love', '{}')",
+            [(f"ιστορία {i}", f"νέα ιστορία {i} " * 20, "σχόλιο", f"Συγγραφέας {i}") for i in range(300)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    main.story_counters.seed(main.count_stories_by_status())
+
+
+@pytest.fixture
+def slow_queries(monkeypatch):
+    query_all = main.query_all
+
+    def slow_query_all(query, params=None):
+        time.sleep(QUERY_LATENCY)
+        return query_all(query, params)
+
+    monkeypatch.setattr(main, "query_all", slow_query_all)
+
+
+async def display_clients(clients: int):
+    """One page load per display client: stories and stats, all at once"""
+    calls = []
+    for _ in range(clients):
+        calls.append(main.get_stories(make_request(), Response()))
+        calls.append(main.get_stats(make_request(), Response()))
+    return await asyncio.gather(*calls)
+
+
+async def measure(clients: int):
+    """Time a burst of clients while checking the event loop keeps ticking"""
+    gaps = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    ticker = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    results = await display_clients(clients)
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticker
+    return elapsed, max(gaps, default=0.0), results
+
+
+def test_throughput_scales_with_display_clients(stories, slow_queries):
+    workers = main.DB_MAX_WORKERS
+
+    async def scenario():
+        await display_clients(1)  # warm up the executor threads and connections
+        return {clients: await measure(clients) for clients in (1, workers, 4 * workers)}
+
+    timings = asyncio.run(scenario())
+    single = timings[1][0]
+
+    for clients, (elapsed, max_gap, results) in timings.items():
+        pages = results[0::2]
+        assert all(len(page["stories"]) == 50 for page in pages)
+        assert all(stats["approved"] == 300 for stats in results[1::2])
+        # The loop never waited on a query
+        assert max_gap < 0.1, (clients, max_gap)
+
+    # Up to DB_MAX_WORKERS clients are served side by side, and beyond that
+    # total time grows with the number of batches, not clients
+    assert timings[workers][0] < 3 * single, timings
+    assert timings[4 * workers][0] < 4 * workers * single / 2, timings
+
+
+def test_loop_stays_responsive_on_real_queries(stories):
+    async def scenario():
+        await display_clients(1)
+        return await measure(100)
+
+    elapsed, max_gap, results = asyncio.run(scenario())
+
+    assert len(results) == 200
+    assert max_gap < 0.1, (elapsed, max_gap)
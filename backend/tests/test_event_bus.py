@@ -0,0 +1,146 @@
+import asyncio
+import random
+
+import psycopg2
+
+import main
+
+
+class FakeNotify:
+    """A pg_notify channel shared by several buses, delivered on the event loop"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.listeners = []
+        self.payloads = []
+
+    def attach(self, bus):
+        self.listeners.append(bus)
+        bus._notify = self.notify
+
+    def notify(self, payloads):
+        # Runs on the db executor, like the real pg_notify round trip
+        for payload in payloads:
+            self.payloads.append(payload)
+            for bus in self.listeners:
+                self.loop.call_soon_threadsafe(bus._receive, payload)
+
+
+def make_bus(received):
+    bus = main.PostgresEventBus("postgresql://unused", "story_events")
+
+    async def handler(topic, payload):
+        received.append((bus.origin, topic, payload))
+
+    bus.handler = handler
+    return bus
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0.01)
+
+
+def test_events_cross_workers_including_chunked_ones():
+    received = []
+
+    async def scenario():
+        notify = FakeNotify(asyncio.get_running_loop())
+        first, second = make_bus(received), make_bus(received)
+        notify.attach(first)
+        notify.attach(second)
+
+        large = "ΑΒΓ" * 9000 + "🙂" * 500
+        await first.publish("displays", '{"type":"stats"}')
+        await second.publish("recent", large)
+        await settle()
+        return notify, first, second, large
+
+    notify, first, second, large = asyncio.run(scenario())
+
+    assert all(len(p.encode()) < 8000 for p in notify.payloads)
+    assert first.stats["chunks"] == 1 and second.stats["chunks"] > 1
+    for bus in (first, second):
+        assert (bus.origin, "displays", '{"type":"stats"}') in received
+        assert (bus.origin, "recent", large) in received
+        assert not bus._partial
+
+
+def test_out_of_order_chunks_are_reassembled():
+    source = make_bus([])
+    body = "moderators\n" + "ω" * 20000
+    chunks = source._chunks(body)
+    payloads = [f"abc-1:{i}:{len(chunks)}|{chunk}" for i, chunk in enumerate(chunks)]
+    random.Random(19).shuffle(payloads)
+    received = []
+
+    async def scenario():
+        bus = make_bus(received)
+        for payload in payloads:
+            bus._receive(payload)
+        await settle()
+        return bus
+
+    bus = asyncio.run(scenario())
+
+    assert len(payloads) > 2
+    assert [(topic, payload) for _, topic, payload in received] == [("moderators", "ω" * 20000)]
+    assert not bus._partial
+
+
+def test_stale_partial_messages_are_dropped(monkeypatch):
+    bus = make_bus([])
+    clock = [1000.0]
+    monkeypatch.setattr(main.time, "monotonic", lambda: clock[0])
+
+    bus._receive("lost-1:0:2|displays\nhalf")
+    clock[0] += 31
+    bus._receive("other-1:0:3|displays\npart")
+
+    assert list(bus._partial) == ["other-1"]
+
+
+class BrokenConnection:
+    notifies = []
+    closed = False
+
+    def fileno(self):
+        return 0
+
+    def poll(self):
+        raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    def close(self):
+        self.closed = True
+
+
+def test_reconnect_dispatches_resync(monkeypatch):
+    received = []
+    bus = make_bus(received)
+    attempts = []
+    real_sleep = asyncio.sleep
+
+    async def listen():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise psycopg2.OperationalError("still down")
+
+    async def fast_sleep(seconds):
+        await real_sleep(0)
+
+    monkeypatch.setattr(bus, "_listen", listen)
+    monkeypatch.setattr(main.asyncio, "sleep", fast_sleep)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        monkeypatch.setattr(loop, "remove_reader", lambda fd: True)
+        bus.conn = BrokenConnection()
+        bus._on_readable()
+        for _ in range(10):
+            await real_sleep(0.01)
+
+    asyncio.run(scenario())
+
+    assert len(attempts) == 2
+    assert bus.stats["reconnects"] == 1
+    assert [(topic, payload) for _, topic, payload in received] == [("resync", "")]
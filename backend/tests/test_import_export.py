@@ -0,0 +1,134 @@
+import asyncio
+import json
+import tempfile
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+import main
+
+
+async def export_bytes(fmt: str) -> bytes:
+    response = await main.export_stories(format=fmt, compress=True)
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def spooled_upload(data: bytes) -> UploadFile:
+    # Starlette buffers multipart files the same way: w+b, rewound after writing
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+b")
+    spooled.write(data)
+    spooled.seek(0)
+    return UploadFile(spooled, filename="stories.json.gz")
+
+
+def story_rows():
+    conn = main.get_db()
+    try:
+        cursor = main.execute_query(conn, "SELECT id, original_text, llm_comment, author_name FROM stories ORDER BY id")
+        return [tuple(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("fmt", ["json", "ndjson"])
+def test_gzipped_export_restores_through_the_endpoint(fresh_db, fmt):
+    theme = {"theme": "love", "emojis": ["💜"]}
+    for i in range(3):
+        main.insert_story(f"ιστορία {i}", f"νέα ιστορία {i}", f"σχόλιο {i}", f"Συγγραφέας {i}", theme)
+    original = story_rows()
+    archive = asyncio.run(export_bytes(fmt))
+    assert archive[:2] == b"\x1f\x8b"
+
+    conn = main.get_db()
+    try:
+        main.execute_query(conn, "DELETE FROM stories")
+        conn.commit()
+    finally:
+        conn.close()
+
+    report = asyncio.run(main.import_story_archive(file=spooled_upload(archive)))
+
+    assert report["read"] == 3 and report["inserted"] == 3
+    assert story_rows() == original
+
+    again = asyncio.run(main.import_story_archive(file=spooled_upload(archive)))
+    assert again["inserted"] == 0 and again["duplicates"] == 3
+
+
+def export_ids(**params) -> list:
+    async def collect():
+        response = await main.export_stories(format="ndjson", **params)
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    lines = asyncio.run(collect()).decode().splitlines()
+    return [json.loads(line)["id"] for line in lines if line.strip()]
+
+
+@pytest.fixture
+def dated_stories(fresh_db):
+    conn = main.get_db()
+    try:
+        conn.executemany(
+            "INSERT INTO stories (id, original_text, status, created_at, moderated_at) VALUES (?, 'ιστορία', ?, ?, ?)",
+            [
+                (1, "approved", "2026-10-15 09:00:00", "2026-10-15 12:00:00"),
+                (2, "pending", "2026-10-16 09:59:59", None),
+                (3, "approved", "2026-10-16 08:00:00", "2026-10-16 11:00:00"),
+                (4, "pending", "2026-10-16 20:00:00", None),
+            ]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("since", [
+    "2026-10-16T10:00:00",
+    "2026-10-16 10:00:00",
+    "2026-10-16T10:00:00.250000",
+    "2026-10-16T12:00:00+02:00",
+    "2026-10-16T10:00:00Z",
+])
+def test_export_since_timestamp(dated_stories, since):
+    assert export_ids(since=since) == [3, 4]
+
+
+def test_export_since_date_and_id(dated_stories):
+    assert export_ids(since="2026-10-16") == [2, 3, 4]
+    assert export_ids(since_id=2) == [3, 4]
+    assert export_ids(since_id=3, since="2026-10-16T10:00:00") == [4]
+    assert export_ids() == [1, 2, 3, 4]
+
+
+@pytest.mark.parametrize("since", ["yesterday", "16/10/2026", "2026-13-01"])
+def test_export_rejects_invalid_since(dated_stories, since):
+    with pytest.raises(HTTPException) as rejected:
+        asyncio.run(main.export_stories(since=since))
+    assert rejected.value.status_code == 400
+
+
+def test_import_row_defaults_match_the_table():
+    before = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+    row = dict(zip(main.IMPORT_COLUMNS, main.import_row({"id": 7, "original_text": "ιστορία"})))
+    after = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    assert row["status"] == "pending"
+    created_at = datetime.strptime(row["created_at"], "%Y-%m-%d %H:%M:%S")
+    assert before <= created_at <= after
+
+    kept = dict(zip(main.IMPORT_COLUMNS, main.import_row(
+        {"id": 8, "original_text": "ιστορία", "status": "approved", "created_at": "2026-10-16 08:00:00"})))
+    assert (kept["status"], kept["created_at"]) == ("approved", "2026-10-16 08:00:00")
+
+
+def test_story_without_status_is_not_displayed(fresh_db):
+    archive = json.dumps({"stories": [{"id": 5, "original_text": "ιστορία", "transformed_text": "νέα ιστορία"}]})
+
+    report = asyncio.run(main.import_story_archive(file=spooled_upload(archive.encode())))
+
+    assert report["inserted"] == 1
+    assert asyncio.run(main.approved_stories_page(50))["stories"] == []
+    pending = main.query_all("SELECT status FROM stories WHERE id = 5")
+    assert pending == [{"status": "pending"}]
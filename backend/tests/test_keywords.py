@@ -0,0 +1,144 @@
+import random
+import timeit
+
+import main
+
+# Frozen copies of the StoryTransformer keyword checks before KeywordClassifier
+
+SENSITIVE = [
+    'αμαξίδιο', 'αναπηρία', 'αναπηρικό', 'άτομο με', 'άτομα με',
+    'διάγνωση', 'ασθένεια', 'νοσεί', 'θεραπεία', 'φάρμακο',
+    'πόνος', 'δυσκολία', 'πρόβλημα', 'δύσκολο', 'δύσκολα',
+    'φοβάμαι', 'φοβία', 'άγχος', 'άγχος', 'στεναχώρια',
+    'μόνος', 'μόνη', 'μοναξιά', 'απομόνωση'
+]
+
+DISTURBING = [
+    'αυτοκτον', 'δολοφον', 'βιασ', 'αιμα', 'αίμα', 'βια', 'βία', 'σφαγ', 'κορμι', 'πτώμα',
+    'βρισι', 'κατάρα', 'γαμ', 'πουστ', 'μαλ@@', 'ρεμάλι',
+    'suicid', 'murder', 'rape', 'blood', 'kill', 'stab', 'dead body', 'corpse',
+    'fuck', 'shit', 'bitch', 'slur'
+]
+
+IRRELEVANT = [
+    'βουλή', 'βουλής', 'κυβέρνηση', 'υπουργός', 'πρωθυπουργός',
+    'εξεταστική', 'επιτροπή', 'σκάνδαλο', 'οπεκεπε',
+    'εκλογές', 'κόμμα', 'ψήφισμα', 'νομοσχέδιο',
+    'χρηματιστήριο', 'μετοχές', 'nasdaq', 'κατάθεση'
+]
+
+THEMES = [
+    ("strength", ['δυνατή', 'δυνατός', 'αντοχή', 'δύναμη', 'παλεύω', 'δεν τα παρατάω']),
+    ("love", ['αγάπη', 'οικογένεια', 'υποστήριξη', 'μαμά', 'μπαμπάς', 'παιδιά']),
+    ("community", ['μαζί', 'κοινότητα', 'φίλοι', 'υποστήριξη', 'αλληλεγγύη']),
+    ("medical", ['γιατρός', 'θεραπεία', 'φάρμακο', 'νοσοκομείο', 'υγεία']),
+    ("success", ['επιτυχία', 'κέρδισα', 'κατάφερα', 'νίκη', 'πρόοδος']),
+]
+
+
+def legacy_is_sensitive(text):
+    t = text.lower()
+    return any(k in t for k in SENSITIVE)
+
+
+def legacy_is_disturbing(text):
+    t = text.lower()
+    return any(k in t for k in DISTURBING)
+
+
+def legacy_is_relevant(text):
+    text_lower = text.lower()
+    return sum(1 for keyword in IRRELEVANT if keyword in text_lower) < 3
+
+
+def legacy_theme(text):
+    text_lower = text.lower()
+    for theme, words in THEMES:
+        if any(word in text_lower for word in words):
+            return theme
+    return "hope"
+
+
+def legacy_classify(text):
+    return legacy_is_sensitive(text), legacy_is_disturbing(text), legacy_is_relevant(text), legacy_theme(text)
+
+
+def classify(classifier, text):
+    result = classifier._classify(text)
+    return result["sensitive"], result["disturbing"], result["is_relevant"], result["emoji_theme"]["theme"]
+
+
+KEYWORDS = SENSITIVE + DISTURBING + IRRELEVANT + [word for _, words in THEMES for word in words]
+FILLER = ("σήμερα περπάτησα στο πάρκο με τη βοήθεια της αδελφής μου και ένιωσα ότι "
+          "η σκλήρυνση κατά πλάκας δεν με σταματά walked today with my friends").split()
+
+STORIES = [
+    "Πριν δύο χρόνια έμαθα ότι έχω σκλήρυνση κατά πλάκας. Στην αρχή φοβόμουν πολύ, αλλά η οικογένειά "
+    "μου ήταν πάντα δίπλα μου. Σήμερα περπατάω ξανά με τα παιδιά μου στο πάρκο κάθε Κυριακή.",
+    "Η θεραπεία είναι δύσκολη και κάποιες μέρες ο πόνος δεν με αφήνει να σηκωθώ. Όμως δεν τα παρατάω. "
+    "Οι φίλοι μου από την κοινότητα με στηρίζουν και μαζί περπατάμε για όσους δεν μπορούν.",
+    "Δουλεύω ως δασκάλα και τα παιδιά στην τάξη μου δεν ξέρουν τίποτα για τη διάγνωση. Θέλω να τους "
+    "δείξω ότι μπορεί κανείς να ζει με μια χρόνια ασθένεια και να χαμογελά.",
+    "I was diagnosed three years ago. Walking this route with everyone today means the world to me.",
+]
+
+
+def mutate(keyword, rng):
+    """A keyword, a fragment of one, or one glued to another, in random case"""
+    choice = rng.random()
+    if choice < 0.2:
+        start = rng.randrange(len(keyword))
+        keyword = keyword[start:rng.randint(start + 1, len(keyword))]
+    elif choice < 0.4:
+        keyword = keyword + rng.choice(KEYWORDS)
+    if rng.random() < 0.2:
+        keyword = keyword.upper()
+    return keyword
+
+
+def generated_texts(count=10000, seed=12):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(0, 30))]
+        words += [mutate(rng.choice(KEYWORDS), rng) for _ in range(rng.randint(0, 6))]
+        rng.shuffle(words)
+        texts.append(rng.choice([" ", "", ", "]).join(words))
+    return texts
+
+
+def test_classifier_matches_legacy_checks():
+    classifier = main.keyword_classifier
+    for text in STORIES + KEYWORDS + generated_texts():
+        assert classify(classifier, text) == legacy_classify(text), text
+
+
+def test_transformer_methods_use_the_classifier():
+    transformer = main.transformer
+    for text in STORIES + [" ".join(IRRELEVANT[:3]), "κάτι για βία"]:
+        sensitive, disturbing, relevant, theme = legacy_classify(text)
+        assert transformer.is_sensitive_content(text) == sensitive
+        assert transformer.is_disturbing(text) == disturbing
+        assert transformer.is_relevant_content(text) == relevant
+        assert transformer.get_emoji_theme(text)["theme"] == theme
+
+
+def per_text_us(func, texts, number=100):
+    return min(timeit.repeat(lambda: [func(text) for text in texts], number=number, repeat=5)) / (number * len(texts)) * 1e6
+
+
+def test_benchmark_against_legacy_checks():
+    # Bypasses the per-text cache so every call does a full scan. On story
+    # text one pass runs level with the four scans (slightly ahead on most
+    # runs); on text made of nothing but keywords the restarts make it
+    # several times slower, which real submissions never are
+    classifier = main.keyword_classifier
+    stories = [" ".join([story] * 2) for story in STORIES]
+    dense = [" ".join(KEYWORDS)]
+    timings = {name: (per_text_us(classifier._classify, texts), per_text_us(legacy_classify, texts))
+               for name, texts in (("story", stories), ("keyword-dense", dense))}
+    for name, (new, old) in timings.items():
+        print(f"{name} text: {new:.1f} us per classification (legacy {old:.1f} us)")
+
+    new, old = timings["story"]
+    assert new < old * 1.5, timings
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+from starlette.responses import Response
+
+import main
+from conftest import make_request
+
+SLOW_GENERATION = 0.5
+
+
+def slow_generate(text, style=None, recent_stories_context=None, deadline=None, hedge=False):
+    time.sleep(SLOW_GENERATION)
+    return {"transformed_text": text, "llm_comment": "", "style_used": "inspirational",
+            "quality_score": 0.5, "analysis": {}, "success": True}
+
+
+def test_display_reads_flow_while_generations_run(fresh_db, monkeypatch):
+    monkeypatch.setattr(main.transformer, "generate_uncached", slow_generate)
+    submissions = main.LLM_MAX_CONCURRENCY
+
+    async def scenario():
+        submits = [
+            asyncio.create_task(main.submit_story(
+                main.StorySubmission(text=f"slow story number {i} for the concurrency test"), None))
+            for i in range(submissions)
+        ]
+        await asyncio.sleep(0.05)
+        latencies = []
+        while not all(task.done() for task in submits):
+            started = time.perf_counter()
+            await main.get_stories(make_request(), Response())
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.01)
+        results = await asyncio.gather(*submits)
+        return latencies, results
+
+    started = time.perf_counter()
+    latencies, results = asyncio.run(scenario())
+    elapsed = time.perf_counter() - started
+
+    assert all(result["success"] for result in results)
+    # The generations ran side by side on the LLM executor, not one after another
+    assert elapsed < SLOW_GENERATION * submissions
+    # Display reads kept being served while they ran
+    assert len(latencies) >= 10
+    assert max(latencies) < 0.2
@@ -0,0 +1,102 @@
+import asyncio
+import sqlite3
+
+from starlette.responses import Response
+
+import main
+from conftest import make_request
+
+LEGACY_STORIES = """CREATE TABLE stories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    original_text TEXT NOT NULL,
+    transformed_text TEXT,
+    author_name TEXT,
+    status TEXT DEFAULT 'pending',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    moderated_at TIMESTAMP,
+    moderated_by TEXT,
+    emoji_theme TEXT,
+    emoji_data TEXT
+)"""
+
+
+def story_columns(conn):
+    return [row[1] for row in conn.execute("PRAGMA table_info(stories)")]
+
+
+def capture_hot_queries(monkeypatch):
+    """Run the hot read paths and record the SQL they send to SQLite"""
+    queries = []
+    execute_query = main.execute_query
+
+    def recording(conn, query, params=None):
+        queries.append((query, params))
+        return execute_query(conn, query, params)
+
+    monkeypatch.setattr(main, "execute_query", recording)
+
+    async def reads():
+        first = await main.get_stories(make_request(), Response(), limit=5)
+        await main.get_stories(make_request(), Response(), limit=5, cursor=first["next_cursor"])
+        await main.get_pending_stories(make_request(), Response(), limit=5)
+        await main.get_pending_stories(make_request(), Response(), limit=5, order="desc")
+
+    asyncio.run(reads())
+    main.recent_stories.load()
+    main.count_stories_by_status()
+    return queries
+
+
+def test_hot_queries_use_indexes(fresh_db, monkeypatch):
+    conn = sqlite3.connect("stories.db")
+    conn.executemany(
+        "INSERT INTO stories (original_text, transformed_text, status, created_at) VALUES (?, ?, ?, ?)",
+        [(f"story {i}", f"story {i}", ("pending", "approved", "rejected")[i % 3],
+          f"2024-01-01 10:{i % 60:02d}:00") for i in range(300)]
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+
+    queries = capture_hot_queries(monkeypatch)
+    assert len(queries) == 6
+
+    for query, params in queries:
+        plan = " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params or ()))
+        assert "USING" in plan and "INDEX" in plan, (query, plan)
+        assert "TEMP B-TREE" not in plan, (query, plan)
+        assert "SCAN stories" not in plan or "COVERING INDEX" in plan, (query, plan)
+    conn.close()
+
+
+def test_migrations_are_idempotent(fresh_db):
+    conn = main.get_db()
+    try:
+        assert main.run_migrations(conn) == []
+        assert main.run_migrations(conn) == []
+    finally:
+        conn.close()
+
+
+def test_migrations_upgrade_legacy_database(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    main.db_pool.close_all()
+    legacy = sqlite3.connect("stories.db")
+    legacy.execute(LEGACY_STORIES)
+    legacy.execute("INSERT INTO stories (original_text, status) VALUES ('old story', 'approved')")
+    legacy.commit()
+    assert "llm_comment" not in story_columns(legacy)
+    legacy.close()
+
+    conn = main.get_db()
+    try:
+        applied = main.run_migrations(conn)
+        assert applied == [version for version, _, _ in main.MIGRATIONS]
+        assert main.run_migrations(conn) == []
+    finally:
+        conn.close()
+        main.db_pool.close_all()
+
+    upgraded = sqlite3.connect("stories.db")
+    assert "llm_comment" in story_columns(upgraded)
+    assert upgraded.execute("SELECT original_text FROM stories").fetchall() == [("old story",)]
+    upgraded.close()
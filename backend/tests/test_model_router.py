@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+import main
+
+
+def open_circuit(router, name):
+    for _ in range(router.failure_threshold):
+        router.record_failure(name, Exception("boom"))
+    router.health[name]["opened_at"] = time.time() - router.cooldown - 1
+
+
+@pytest.fixture
+def router(monkeypatch):
+    router = main.ModelRouter(["a", "b"], alpha=0.3, failure_threshold=3, cooldown=60)
+    monkeypatch.setattr(main, "model_router", router)
+    monkeypatch.setattr(main, "models", [("a", object()), ("b", object())])
+    return router
+
+
+def test_expired_deadline_does_not_take_the_probe(router):
+    open_circuit(router, "a")
+
+    with pytest.raises(main.LLMDeadlineExceeded):
+        main.generate_with_fallback("prompt", deadline=main.LLMDeadline(0))
+
+    assert router.health["a"]["state"] == "open"
+    assert [name for name, _ in router.order(main.models)][0] == "a"
+
+
+def test_unattempted_probe_is_released(router):
+    open_circuit(router, "a")
+    probes = []
+    assert [name for name, _ in router.order(main.models, probes)] == ["a", "b"]
+    assert probes == ["a"]
+    # While the probe is out nobody else gets it
+    assert [name for name, _ in router.order(main.models)] == ["b"]
+
+    router.release_probe("a")
+
+    assert [name for name, _ in router.order(main.models)] == ["a", "b"]
+
+
+def test_attempted_probe_is_not_released(router, monkeypatch):
+    open_circuit(router, "a")
+    monkeypatch.setattr(main, "call_model", lambda name, *args: "text")
+
+    assert main.generate_with_fallback("prompt") == "text"
+
+    assert main.model_router.health["a"]["state"] == "half_open"
@@ -0,0 +1,91 @@
+import random
+import re
+
+import main
+
+
+def legacy_assess_quality(original: str, transformed: str) -> float:
+    """Frozen copy of StoryTransformer.assess_quality before QualityScorer"""
+    def tokenize(text: str) -> set:
+        tokens = re.findall(r"[\w']+", text.lower(), flags=re.UNICODE)
+        stop = {
+            'και','το','τα','τι','να','που','σε','στη','στην','στο','στον','για','με','από','δε','δεν','μη','μην','είναι','ή','θα','ως','ως','ένα','μία','μια','ο','η','οι','των','των'
+        }
+        return {t for t in tokens if t not in stop and len(t) > 2}
+
+    orig = tokenize(original)
+    trans = tokenize(transformed)
+    overlap = len(orig & trans) / max(len(orig) or 1, 1)
+
+    length_ratio = len(transformed) / max(len(original), 1)
+    is_appropriate_length = 50 <= len(transformed) <= 300
+
+    score = 0.0
+    if overlap >= 0.15:
+        score += 0.5
+    elif overlap >= 0.08:
+        score += 0.3
+
+    if 0.3 <= length_ratio <= 1.5:
+        score += 0.25
+    if is_appropriate_length:
+        score += 0.25
+
+    return min(score, 1.0)
+
+
+HAND_PICKED = [
+    ("", ""),
+    ("Περπάτησα σήμερα στο πάρκο με την οικογένειά μου.", "Περπάτησα σήμερα στο πάρκο με την οικογένειά μου."),
+    ("Περπάτησα σήμερα στο πάρκο με την οικογένειά μου.", "Μια όμορφη μέρα στη φύση."),
+    ("Η ΣΚΛΉΡΥΝΣΗ δεν με σταματά, και θα συνεχίσω να περπατάμε!", "Η σκλήρυνση δεν με σταματά· συνεχίζω να περπατώ."),
+    ("I walked today with friends, it's been a great day", "Walked with friends today - it's been great"),
+    ("Δεν ήταν εύκολο, αλλά τα κατάφερα με τη στήριξη των φίλων μου.", "x" * 49),
+    ("Δεν ήταν εύκολο, αλλά τα κατάφερα με τη στήριξη των φίλων μου.", "x" * 50),
+    ("a" * 200, "a" * 300),
+    ("a" * 200, "a" * 301),
+    ("λέξη " * 20, "λέξη " * 6),
+    ("café naïve Ωμέγα ΣΊΣΥΦΟΣ", "CAFÉ naive ωμέγα σίσυφος"),
+    (None, "κείμενο"),
+]
+
+WORDS = ("περπάτημα βήμα δύναμη ελπίδα φίλοι οικογένεια πάρκο θάλασσα μέρα "
+         "και το να σε για με από δεν θα ένα walk hope strength day it's don't").split()
+
+
+def generated_pairs(count=2000, seed=13):
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        original = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 60)))
+        kept = [word for word in original.split() if rng.random() < rng.random()]
+        extra = [rng.choice(WORDS).upper() if rng.random() < 0.2 else rng.choice(WORDS)
+                 for _ in range(rng.randint(0, 40))]
+        rng.shuffle(extra)
+        pairs.append((original, " ".join(kept + extra)))
+    return pairs
+
+
+def expected(original, transformed):
+    return legacy_assess_quality(original or "", transformed or "")
+
+
+def test_score_matches_legacy_assess_quality():
+    scorer = main.QualityScorer()
+    for original, transformed in HAND_PICKED + generated_pairs():
+        if original is None or transformed is None:
+            continue
+        assert scorer.score(original, transformed) == expected(original, transformed), (original, transformed)
+
+
+def test_score_batch_matches_legacy_assess_quality():
+    pairs = HAND_PICKED + generated_pairs()
+    # Repeated texts exercise the per-batch token cache
+    pairs += pairs[:100]
+    scores = main.QualityScorer().score_batch(pairs)
+    assert scores == [expected(original, transformed) for original, transformed in pairs]
+
+
+def test_transformer_delegates_to_scorer():
+    original, transformed = HAND_PICKED[3]
+    assert main.transformer.assess_quality(original, transformed) == expected(original, transformed)
@@ -0,0 +1,52 @@
+import pytest
+
+import main
+
+STORY = "Πριν δύο χρόνια έμαθα ότι έχω σκλήρυνση κατά πλάκας. Σήμερα περπατάω ξανά με την οικογένειά μου."
+
+
+@pytest.fixture
+def reply(fresh_db, monkeypatch):
+    """Make the single LLM call answer with whatever the test sets"""
+    answer = {}
+    stored = []
+    monkeypatch.setattr(main, "LLM_SINGLE_PASS", True)
+    monkeypatch.setattr(main, "generate_with_fallback", lambda prompt, **kwargs: answer["text"])
+    monkeypatch.setattr(main.transformation_cache, "put", lambda key, result: stored.append(result))
+    answer["stored"] = stored
+    return answer
+
+
+@pytest.mark.parametrize("text", [
+    # Cut off by max_tokens inside the code fence
+    '```json\n{"emotional_tone": "hopeful", "main_themes": ["hope"], "edited": "Πριν δύο χρόνια έμαθα',
+    '```json\n{"emotional_tone": "hopeful", "edited": "Πριν δύο χρόνια έμαθα.", "comment": "Δύναμη',
+    "Συγγνώμη, μπορείτε να επαναλάβετε;",
+])
+def test_unusable_reply_is_not_saved_or_cached(reply, text):
+    reply["text"] = text
+
+    result = main.transformer.generate_enhanced(STORY, recent_stories_context="")
+
+    assert result["success"] is False
+    assert text not in result["transformed_text"]
+    assert reply["stored"] == []
+
+
+def test_json_reply_is_used(reply):
+    reply["text"] = '```json\n{"emotional_tone": "hopeful", "edited": "Σήμερα περπατάω.", "comment": "Μπράβο!"}\n```'
+
+    result = main.transformer.generate_enhanced(STORY, recent_stories_context="")
+
+    assert result["success"] is True
+    assert (result["transformed_text"], result["llm_comment"]) == ("Σήμερα περπατάω.", "Μπράβο!")
+    assert len(reply["stored"]) == 1
+
+
+def test_text_format_reply_is_still_parsed(reply):
+    reply["text"] = "ΕΠΕΞΕΡΓΑΣΜΕΝΟ: Σήμερα περπατάω.\nΣΧΟΛΙΟ: Μπράβο!"
+
+    result = main.transformer.generate_enhanced(STORY, recent_stories_context="")
+
+    assert result["success"] is True
+    assert (result["transformed_text"], result["llm_comment"]) == ("Σήμερα περπατάω.", "Μπράβο!")
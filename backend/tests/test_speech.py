@@ -0,0 +1,77 @@
+import asyncio
+import io
+
+import pytest
+import speech_recognition as sr
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+import main
+
+AUDIO = sr.AudioData(b"\0\0" * main.AUDIO_SAMPLE_RATE, main.AUDIO_SAMPLE_RATE, main.AUDIO_SAMPLE_WIDTH)
+LANGUAGES = ["el-GR", "en-US", "el"]
+
+
+def stub(languages, text="Περπατάμε μαζί", delay=0.0):
+    recognizer = main.StubSpeechRecognizer()
+    recognizer.languages = languages
+    recognizer.text = text
+    recognizer.delay = delay
+    return recognizer
+
+
+class OfflineRecognizer(main.SpeechRecognizer):
+    """Fails the way GoogleSpeechRecognizer does when the API can't be reached"""
+
+    name = "offline"
+
+    def __init__(self, understood=()):
+        self.understood = understood
+
+    def recognize(self, audio_data, language):
+        if language in self.understood:
+            return "Περπατάμε μαζί", 0.9
+        if language == "en-US":
+            raise sr.UnknownValueError(language)
+        raise sr.RequestError("recognition connection failed: [Errno 101] Network is unreachable")
+
+
+@pytest.mark.parametrize("strategy", ["preferred", "first", "confident"])
+def test_recognizes_with_stub(strategy):
+    recognizer = stub(["en-US"])
+    assert main.recognize_speech(AUDIO, recognizer, LANGUAGES, strategy) == "Περπατάμε μαζί"
+
+
+def test_nothing_understood_is_unknown_value():
+    with pytest.raises(sr.UnknownValueError):
+        main.recognize_speech(AUDIO, stub([]), LANGUAGES, "preferred")
+
+
+@pytest.mark.parametrize("strategy", ["preferred", "first", "confident"])
+def test_backend_failure_is_raised_when_nothing_succeeds(strategy):
+    with pytest.raises(sr.RequestError):
+        main.recognize_speech(AUDIO, OfflineRecognizer(), LANGUAGES, strategy)
+
+
+def test_backend_failure_for_one_language_is_tolerated():
+    recognizer = OfflineRecognizer(understood=["el"])
+    assert main.recognize_speech(AUDIO, recognizer, LANGUAGES, "preferred") == "Περπατάμε μαζί"
+
+
+@pytest.mark.parametrize("recognizer, status", [(stub([]), 400), (OfflineRecognizer(), 500)])
+def test_transcribe_status(monkeypatch, recognizer, status):
+    monkeypatch.setattr(main, "decode_and_check", lambda data, file_ext: AUDIO.frame_data)
+    monkeypatch.setattr(main, "speech_recognizer", recognizer)
+    upload = UploadFile(io.BytesIO(b"recording"), filename="a.webm")
+
+    with pytest.raises(HTTPException) as failed:
+        asyncio.run(main.transcribe_audio(audio=upload, file=None))
+    assert failed.value.status_code == status
+
+
+def test_transcribe_returns_text(monkeypatch):
+    monkeypatch.setattr(main, "decode_and_check", lambda data, file_ext: AUDIO.frame_data)
+    monkeypatch.setattr(main, "speech_recognizer", stub(["el-GR"]))
+    upload = UploadFile(io.BytesIO(b"recording"), filename="a.webm")
+
+    assert asyncio.run(main.transcribe_audio(audio=upload, file=None)) == {"text": "Περπατάμε μαζί"}
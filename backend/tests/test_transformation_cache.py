@@ -0,0 +1,29 @@
+import main
+
+
+class FailingConnection:
+    def __init__(self):
+        self.closed = False
+
+    def execute(self, *args, **kwargs):
+        raise main.sqlite3.OperationalError("database is locked")
+
+    def close(self):
+        self.closed = True
+
+
+def test_cache_returns_connection_when_queries_fail(fresh_db, monkeypatch):
+    connections = []
+
+    def failing_db():
+        connections.append(FailingConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(main, "get_db", failing_db)
+    cache = main.TransformationCache(max_entries=10, ttl_seconds=60, max_rows=100)
+
+    assert cache.get("missing") is None
+    cache.put("key", {"transformed_text": "x"})
+
+    assert len(connections) == 2
+    assert all(conn.closed for conn in connections)
@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+
+import main
+
+
+class FakeSocket:
+    """Stands in for a WebSocket: records frames, or stalls or fails on send"""
+
+    def __init__(self, behaviour: str = "ok"):
+        self.behaviour = behaviour
+        self.frames = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        if self.behaviour == "stalled":
+            await asyncio.sleep(3600)
+        if self.behaviour == "dead":
+            raise ConnectionResetError("peer went away")
+        self.frames.append(frame)
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = main.ConnectionManager()
+    bus = main.LocalEventBus()
+    monkeypatch.setattr(main, "manager", manager)
+    monkeypatch.setattr(main, "event_bus", bus)
+    monkeypatch.setattr(main, "display_log", main.DisplayEventLog(main.DISPLAY_REPLAY_SIZE))
+    monkeypatch.setattr(main, "WS_SEND_TIMEOUT", 0.1)
+    asyncio.run(bus.start(main.dispatch_event))
+    return manager
+
+
+async def connect_all(manager, sockets):
+    for socket in sockets:
+        await manager.connect(socket)
+
+
+async def drain(manager, seconds: float = 0.3):
+    await asyncio.sleep(seconds)
+    for client in list(manager.active_connections.values()):
+        client.writer.cancel()
+
+
+def broadcast_seconds(manager, clients: int, messages: int = 20) -> float:
+    async def scenario():
+        await connect_all(manager, [FakeSocket() for _ in range(clients)])
+        started = time.perf_counter()
+        for i in range(messages):
+            await manager.broadcast({"type": "new_story", "data": {"id": i, "text": "x" * 500}})
+        elapsed = time.perf_counter() - started
+        await drain(manager, 0)
+        manager.active_connections.clear()
+        return elapsed
+
+    return asyncio.run(scenario())
+
+
+def test_broadcast_only_enqueues(manager):
+    small = broadcast_seconds(manager, 10)
+    large = broadcast_seconds(manager, 500)
+    # Encoding happens once per message and sends happen on the writer
+    # tasks, so publishing to 500 clients costs queue puts, not socket writes
+    assert manager.broadcasts == 40
+    assert large < 0.25, (small, large)
+
+
+def test_slow_and_dead_clients_are_evicted(manager):
+    healthy = [FakeSocket() for _ in range(300)]
+    stalled = [FakeSocket("stalled") for _ in range(30)]
+    dead = [FakeSocket("dead") for _ in range(30)]
+
+    async def scenario():
+        await connect_all(manager, healthy + stalled + dead)
+        started = time.perf_counter()
+        for i in range(10):
+            await manager.broadcast({"type": "new_story", "data": {"id": i}})
+        elapsed = time.perf_counter() - started
+        await drain(manager)
+        return elapsed
+
+    elapsed = asyncio.run(scenario())
+
+    assert elapsed < main.WS_SEND_TIMEOUT
+    assert all(len(socket.frames) == 10 for socket in healthy)
+    assert all(socket.close_code == 1013 for socket in stalled + dead)
+    assert all(socket.close_code is None for socket in healthy)
+    assert manager.evicted == 60
+    assert len(manager.active_connections) == 300
+
+
+def test_full_queue_evicts_client(manager, monkeypatch):
+    monkeypatch.setattr(main, "WS_SEND_QUEUE_SIZE", 4)
+    monkeypatch.setattr(main, "WS_SEND_TIMEOUT", 30)
+    stalled = FakeSocket("stalled")
+
+    async def scenario():
+        await manager.connect(stalled)
+        for i in range(10):
+            await manager.broadcast({"type": "stats", "data": {"n": i}})
+        await drain(manager, 0.05)
+
+    asyncio.run(scenario())
+
+    assert stalled.close_code == 1013
+    assert manager.evicted == 1
+    assert not manager.active_connections
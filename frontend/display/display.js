@@ -15,13 +15,19 @@ function createParticles() {
 
 let heartbeatTimer;
 
+// Resume state: the server numbers display events per epoch, so after a
+// reconnect it only replays what we missed (or sends a reset)
+let streamEpoch = null;
+let lastSeq = 0;
+const shownStoryIds = new Set();
+
 function connectWebSocket() {
     const proto = window.location.protocol === 'https:' ? 'wss' : 'ws';
     ws = new WebSocket(`${proto}://${window.location.host}/ws/display`);
     
     ws.onopen = () => { 
         console.log('✅ Display WebSocket connected'); 
-        loadApprovedStories(); 
+        ws.send(JSON.stringify({ type: 'resume', epoch: streamEpoch, last_seq: lastSeq }));
 
         clearInterval(heartbeatTimer);
         heartbeatTimer = setInterval(() => {
@@ -34,10 +40,23 @@ function connectWebSocket() {
     ws.onmessage = (event) => {
         const message = JSON.parse(event.data);
         console.log('📨 WebSocket message:', message);
+        if (message.type === 'reset') {
+            // A reset starts the stream over in the server's epoch: a restarted
+            // server or another worker may number its frames lower than we had
+            streamEpoch = message.epoch;
+            lastSeq = message.seq;
+            renderStories(message.stories);
+            return;
+        }
+        if (message.seq !== undefined) {
+            if (message.seq <= lastSeq) return;
+            lastSeq = message.seq;
+        }
         if (message.type === 'new_story') {
             console.log('🎉 New story with emoji theme:', message.data.emoji_theme_data);
             addStoryCard(message.data, true);
-            updateStatsCounter();
+        } else if (message.type === 'stats') {
+            renderStats(message.data);
         } else if (message.type === 'clear_display') {
             console.log('🗑️ Clear display command received from moderator:', message.moderator);
             clearDisplay();
@@ -55,42 +74,36 @@ function connectWebSocket() {
     };
 }
 
-async function loadApprovedStories() {
-    console.log('📚 Loading approved stories...');
-    try {
-        const response = await fetch('/api/stories?limit=20');
-        const stories = await response.json();
-        
-        console.log('📖 Loaded stories:', stories.length, stories);
-        
-        storiesContainer.innerHTML = '';
-        
-        if (stories.length === 0) {
-            console.log('📭 No stories to display');
-            storiesContainer.innerHTML = `
-                <div class="welcome-message">
-                    <div class="welcome-icon">💜</div>
-                    <h2>Καλώς ήρθατε! 🌟</h2>
-                    <p>Οι ιστορίες σας θα εμφανιστούν εδώ... ✨</p>
-                    <div class="welcome-emoji">🎯 💪 🌈 🎉</div>
-                </div>
-            `;
-        } else {
-            console.log('✨ Displaying', stories.length, 'stories');
-            stories.reverse().forEach((story, index) => {
-                console.log(`Adding story ${index + 1}:`, story);
-                addStoryCard(story, false);
-            });
-        }
-        
-        updateStatsCounter();
-    } catch (error) {
-        console.error('❌ Error loading stories:', error);
+// Rebuild the wall from the latest approved stories (newest first)
+function renderStories(stories) {
+    console.log('📖 Loaded stories:', stories.length, stories);
+    
+    storiesContainer.innerHTML = '';
+    shownStoryIds.clear();
+    
+    if (stories.length === 0) {
+        console.log('📭 No stories to display');
+        storiesContainer.innerHTML = `
+            <div class="welcome-message">
+                <div class="welcome-icon">💜</div>
+                <h2>Καλώς ήρθατε! 🌟</h2>
+                <p>Οι ιστορίες σας θα εμφανιστούν εδώ... ✨</p>
+                <div class="welcome-emoji">🎯 💪 🌈 🎉</div>
+            </div>
+        `;
+    } else {
+        console.log('✨ Displaying', stories.length, 'stories');
+        stories.reverse().forEach((story, index) => {
+            console.log(`Adding story ${index + 1}:`, story);
+            addStoryCard(story, false);
+        });
     }
 }
 
 function addStoryCard(story, animate = true) {
     console.log('➕ Adding story card:', story);
+    if (shownStoryIds.has(story.id)) return;
+    shownStoryIds.add(story.id);
     
     const welcomeMsg = storiesContainer.querySelector('.welcome-message');
     if (welcomeMsg) {
@@ -157,20 +170,15 @@ function addStoryCard(story, animate = true) {
     }
 }
 
-async function updateStatsCounter() {
-    try {
-        const response = await fetch('/api/stats');
-        const stats = await response.json();
-        
-        console.log('📊 Stats:', stats);
-        totalStoriesCounter.textContent = stats.approved;
-    } catch (error) {
-        console.error('❌ Error updating stats:', error);
-    }
+// Stats are pushed over the WebSocket on connect and on every change
+function renderStats(stats) {
+    console.log('📊 Stats:', stats);
+    totalStoriesCounter.textContent = stats.approved;
 }
 
 function clearDisplay() {
     console.log('🗑️ Clearing display...');
+    shownStoryIds.clear();
     storiesContainer.innerHTML = `
         <div class="welcome-message">
             <div class="welcome-icon">💜</div>
@@ -179,10 +187,8 @@ function clearDisplay() {
             <div class="welcome-emoji">🎯 💪 🌈 🎉</div>
         </div>
     `;
-    updateStatsCounter();
 }
 
 console.log('🚀 Initializing display page...');
 createParticles();
 connectWebSocket();
-setInterval(updateStatsCounter, 30000);
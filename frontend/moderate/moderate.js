@@ -44,7 +44,6 @@ function connectWebSocket() {
         statusDot.classList.remove('disconnected');
         connectionStatus.textContent = 'Συνδεδεμένο';
         loadPendingStories();
-        loadStats();
 
         // Heartbeat to keep connection alive behind proxies
         clearInterval(heartbeatTimer);
@@ -60,8 +59,9 @@ function connectWebSocket() {
         if (message.type === 'new_submission') {
             console.log('📝 New submission received:', message.data);
             addStoryCard(message.data);
-            loadStats();
             showNotification('Νέα ιστορία προς έγκριση!', 'success');
+        } else if (message.type === 'stats') {
+            renderStats(message.data);
         }
     };
     
@@ -78,10 +78,26 @@ function connectWebSocket() {
     };
 }
 
+// Pending stories are paged newest first; older pages load as the
+// sentinel below the queue scrolls into view
+const PAGE_SIZE = 30;
+let nextCursor = null;
+let loadingPage = false;
+const queueSentinel = document.getElementById('queue-sentinel');
+
+async function fetchPendingPage(cursor) {
+    const params = new URLSearchParams({ order: 'desc', limit: PAGE_SIZE });
+    if (cursor) params.set('cursor', cursor);
+    // no-cache: the browser revalidates with If-None-Match and gets a 304 when nothing changed
+    const response = await fetch(`/api/stories/pending?${params}`, { cache: 'no-cache' });
+    return response.json();
+}
+
 async function loadPendingStories() {
     try {
-        const response = await fetch('/api/stories/pending');
-        const stories = await response.json();
+        const page = await fetchPendingPage(null);
+        const stories = page.stories;
+        nextCursor = page.next_cursor;
         
         pendingQueue.innerHTML = '';
         
@@ -94,27 +110,41 @@ async function loadPendingStories() {
                 </div>
             `;
         } else {
-            stories.forEach(story => addStoryCard(story));
+            stories.forEach(story => addStoryCard(story, true));
         }
     } catch (error) {
         console.error('Error loading pending stories:', error);
     }
 }
 
-async function loadStats() {
+async function loadMorePendingStories() {
+    if (!nextCursor || loadingPage) return;
+    loadingPage = true;
     try {
-        const response = await fetch('/api/stats');
-        const stats = await response.json();
-        
-        document.getElementById('stat-pending').textContent = stats.pending;
-        document.getElementById('stat-approved').textContent = stats.approved;
-        document.getElementById('stat-rejected').textContent = stats.rejected;
+        const page = await fetchPendingPage(nextCursor);
+        nextCursor = page.next_cursor;
+        page.stories
+            .filter(story => !document.getElementById(`story-${story.id}`))
+            .forEach(story => addStoryCard(story, true));
     } catch (error) {
-        console.error('Error loading stats:', error);
+        console.error('Error loading more pending stories:', error);
+    } finally {
+        loadingPage = false;
     }
 }
 
-function addStoryCard(story) {
+new IntersectionObserver((entries) => {
+    if (entries.some(entry => entry.isIntersecting)) loadMorePendingStories();
+}).observe(queueSentinel);
+
+// Stats are pushed over the WebSocket on connect and on every change
+function renderStats(stats) {
+    document.getElementById('stat-pending').textContent = stats.pending;
+    document.getElementById('stat-approved').textContent = stats.approved;
+    document.getElementById('stat-rejected').textContent = stats.rejected;
+}
+
+function addStoryCard(story, append = false) {
     const emptyState = pendingQueue.querySelector('.empty-state');
     if (emptyState) {
         pendingQueue.innerHTML = '';
@@ -162,7 +192,11 @@ function addStoryCard(story) {
         </div>
     `;
     
-    pendingQueue.insertBefore(card, pendingQueue.firstChild);
+    if (append) {
+        pendingQueue.appendChild(card);
+    } else {
+        pendingQueue.insertBefore(card, pendingQueue.firstChild);
+    }
 }
 
 async function moderateStory(storyId, action) {
@@ -210,8 +244,6 @@ async function moderateStory(storyId, action) {
         const actionText = action === 'approve' ? 'εγκρίθηκε' : 'απορρίφθηκε';
         showNotification(`Η ιστορία ${actionText} επιτυχώς`, 'success');
         
-        loadStats();
-        
     } catch (error) {
         console.error('Moderation error:', error);
         showNotification('Σφάλμα κατά την επεξεργασία', 'error');